@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+""" Batch runner: solves every file in a folder on a pool of warm worker processes and writes one JSON line per
+instance. Replaces runAll.sh / runAllParallel.sh (no GNU parallel, no interpreter start-up per instance).
+
+Usage: python -m src.python.batch <inputFolder/> <timeLimit> <logFile> [--jobs N] [--memory MB]
+                                  [--engine cdcl|dpll1|dpll2|dpll3] [--restart luby|glucose|none]
+
+Each worker imports the solvers once and then takes instances one at a time. A worker that runs past the time
+limit is killed and replaced by a fresh one; the memory limit is an RLIMIT_AS on every worker.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Optional, List
+from .engines import ENGINES, run_engine
+from .csr import CACHE_SUFFIX
+from .cubes import PROGRESS_SUFFIX
+from .cdcl.restarts import RESTART_POLICIES
+
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None
+
+
+def worker_main(conn, memory_mb: Optional[int]):
+    if memory_mb and resource is not None:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    sys.stdout = open(os.devnull, 'w')  # the engines print progress
+
+    while True:
+        task = conn.recv()
+        if task is None:
+            return
+        file_name, options = task
+        try:
+            result = run_engine(file_name, **options)
+            record = {
+                "Status": "ok" if result.verified else "wrong",
+                "Result": "SAT" if result.sat else "UNSAT",
+                "ParseTime": round(result.parse_time, 4),
+                "SolveTime": round(result.solve_time, 4),
+                "Stats": result.stats,
+            }
+            if result.sat:
+                record["Solution"] = " ".join(f"{v} {a}" for v, a in result.assignments.items())
+        except MemoryError:
+            conn.send({"Status": "memout"})
+            return  # the heap may be in a bad state; the runner starts a fresh worker
+        except Exception as e:
+            record = {"Status": "error", "Error": f"{type(e).__name__}: {e}"}
+        conn.send(record)
+
+
+class Worker:
+    def __init__(self, memory_mb: Optional[int]):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=worker_main, args=(child_conn, memory_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.file_name: Optional[str] = None  # instance it is working on
+        self.start = 0.0
+
+    def submit(self, file_name: str, options: dict):
+        self.file_name = file_name
+        self.start = time.time()
+        self.conn.send((file_name, options))
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        self.conn.send(None)
+        self.process.join()
+        self.conn.close()
+
+
+def run_batch(files: List[str], time_limit: float, log_file: str, jobs: int, memory_mb: Optional[int], options: dict):
+    pending = list(reversed(files))
+    workers = [Worker(memory_mb) for _ in range(min(jobs, len(files)))]
+    with open(log_file, 'a') as log:
+        def record(worker: Worker, result: dict):
+            elapsed = time.time() - worker.start
+            line = {"Instance": Path(worker.file_name).name, "Time": f"{elapsed:.2f}", "Result": "--"}
+            line.update(result)
+            line["Path"] = worker.file_name
+            print(f"{line['Instance']}: {line['Status']} {line['Result']} {line['Time']}s")
+            log.write(json.dumps(line) + "\n")
+            log.flush()
+            worker.file_name = None
+
+        for worker in workers:
+            worker.submit(pending.pop(), options)
+
+        while any(w.file_name is not None for w in workers):
+            busy = [w for w in workers if w.file_name is not None]
+            deadline = min(w.start for w in busy) + time_limit
+            ready = wait([w.conn for w in busy], timeout=max(0.0, deadline - time.time()))
+
+            for i, worker in enumerate(workers):
+                if worker.file_name is None:
+                    continue
+                replace = False
+                if worker.conn in ready:
+                    try:
+                        result = worker.conn.recv()
+                    except EOFError:  # died without answering (e.g. killed by the OOM killer)
+                        result = {"Status": "crashed"}
+                    record(worker, result)
+                    replace = result["Status"] in ("memout", "crashed")
+                elif time.time() - worker.start >= time_limit:
+                    record(worker, {"Status": "timeout"})
+                    replace = True
+
+                if replace:
+                    worker.kill()
+                    worker = workers[i] = Worker(memory_mb)
+                if worker.file_name is None and pending:
+                    worker.submit(pending.pop(), options)
+
+    for worker in workers:
+        worker.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve every file in a folder and write one JSON line per instance")
+    parser.add_argument("input_folder")
+    parser.add_argument("time_limit", type=float, help="seconds per instance")
+    parser.add_argument("log_file")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes (default: all cores)")
+    parser.add_argument("--memory", type=int, default=None, help="address-space limit per worker, in MB")
+    parser.add_argument("--engine", choices=ENGINES, default="cdcl")
+    parser.add_argument("--restart", choices=list(RESTART_POLICIES), default="luby")
+    args = parser.parse_args()
+
+    if os.path.exists(args.log_file):
+        print(f"Logfile {args.log_file} already exists, terminating.")
+        sys.exit(1)
+
+    files = sorted(str(p.resolve()) for p in Path(args.input_folder).glob("*.*")
+                   if p.is_file() and p.suffix not in (CACHE_SUFFIX, PROGRESS_SUFFIX))
+    options = {"engine": args.engine}
+    if args.engine == "cdcl":
+        options["restart"] = args.restart
+    run_batch(files, args.time_limit, args.log_file, args.jobs, args.memory, options)
+
+
+if __name__ == "__main__":
+    main()
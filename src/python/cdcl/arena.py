@@ -0,0 +1,88 @@
+from array import array
+from typing import List
+
+# Every long clause lives in one flat array('i') and is referred to by the offset of its header (cref):
+#   [size, flags, lbd, lit_0, lit_1, ..., lit_{size-1}]
+# lit_0 and lit_1 are the two watched literals.
+HEADER = 3
+CREF_UNDEF = -1
+
+# flags
+LEARNT = 1
+DELETED = 2
+USED = 4          # (learnt) involved in a conflict since the last reduceDB
+TIER_SHIFT = 3    # (learnt) tier lives in the bits above the flags
+
+
+class ClauseArena:
+    def __init__(self):
+        self.data = array('i')
+        self.wasted = 0  # words taken up by deleted clauses, reclaimed by collect()
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def alloc(self, lits: List[int], learnt: bool = False, lbd: int = 0, tier: int = 0) -> int:
+        cref = len(self.data)
+        self.data.append(len(lits))
+        self.data.append((LEARNT | (tier << TIER_SHIFT)) if learnt else 0)
+        self.data.append(lbd)
+        self.data.extend(lits)
+        return cref
+
+    def free(self, cref: int):
+        self.data[cref + 1] |= DELETED
+        self.wasted += HEADER + self.data[cref]
+
+    def size(self, cref: int) -> int:
+        return self.data[cref]
+
+    def lits(self, cref: int) -> array:
+        start = cref + HEADER
+        return self.data[start:start + self.data[cref]]
+
+    def is_learnt(self, cref: int) -> bool:
+        return bool(self.data[cref + 1] & LEARNT)
+
+    def is_deleted(self, cref: int) -> bool:
+        return bool(self.data[cref + 1] & DELETED)
+
+    def lbd(self, cref: int) -> int:
+        return self.data[cref + 2]
+
+    def set_lbd(self, cref: int, lbd: int):
+        self.data[cref + 2] = lbd
+
+    def tier(self, cref: int) -> int:
+        return self.data[cref + 1] >> TIER_SHIFT
+
+    def set_tier(self, cref: int, tier: int):
+        flags = self.data[cref + 1]
+        self.data[cref + 1] = (flags & ((1 << TIER_SHIFT) - 1)) | (tier << TIER_SHIFT)
+
+    def is_used(self, cref: int) -> bool:
+        return bool(self.data[cref + 1] & USED)
+
+    def set_used(self, cref: int, used: bool):
+        if used:
+            self.data[cref + 1] |= USED
+        else:
+            self.data[cref + 1] &= ~USED
+
+    def collect(self) -> array:
+        """ Compacts the arena, dropping deleted clauses. Returns the old data, in which the lbd slot of every
+        surviving clause has been overwritten with its new cref (a forwarding pointer for relocation). """
+        old = self.data
+        new = array('i')
+        cref = 0
+        n = len(old)
+        while cref < n:
+            end = cref + HEADER + old[cref]
+            if not old[cref + 1] & DELETED:
+                new_cref = len(new)
+                new.extend(old[cref:end])
+                old[cref + 2] = new_cref
+            cref = end
+        self.data = new
+        self.wasted = 0
+        return old
@@ -1,357 +1,1199 @@
-from attr import dataclass
-from typing import Optional, Set, List, Dict
-import heapq
-from .utils import debug_print, FunctionStats
+import random
+import time
+from array import array
+from typing import Optional, Set, List, Dict, Collection, Sequence
+from .utils import debug_print, FunctionStats, track_call_and_time, DEBUG
+from .arena import ClauseArena, HEADER, CREF_UNDEF, LEARNT, DELETED
+from .restarts import RestartPolicy, LubyRestarts
+from .sharing import ClauseSharing
+from .elim import Simplifier, extend_model, MAX_CLAUSES as ELIM_MAX_CLAUSES
+from .probe import probe_failed_literals, equivalent_literals, substitute, PROBE_STEPS_PER_CLAUSE, PROBE_MIN_STEPS
+from .inprocess import vivify, subsume, INPROCESS_INTERVAL, VIVIFY_EFFORT, VIVIFY_MIN_STEPS, VIVIFY_LEARNTS_SHARE, \
+    VIVIFY_SHARE
 
 class VSIDSHeap:
-    def __init__(self, decay_factor=0.95):
-        self.heap = []
+    """ Indexed binary max-heap of variables ordered by activity (MiniSat's order heap).
+
+    `indices[v]` is the position of v in `heap` (-1 if v is not in the heap), so bumping a
+    variable is a single sift-up instead of a scan + heapify.
+    """
+    def __init__(self, num_vars: int, decay_factor=0.95):
+        self.heap: list[int] = []
+        self.indices: list[int] = [-1] * (num_vars + 1)
+        self.activity: list[float] = [0.0] * (num_vars + 1)
         self.decay_factor = decay_factor
-        self.var_inc = 1
+        self.var_inc = 1.0
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def __contains__(self, var: int) -> bool:
+        return var < len(self.indices) and self.indices[var] >= 0
+
+    def grow(self, var: int):
+        if var >= len(self.indices):
+            extra = var + 1 - len(self.indices)
+            self.indices.extend([-1] * extra)
+            self.activity.extend([0.0] * extra)
 
-    def push(self, lit: int, score):
-        heapq.heappush(self.heap, (score, lit))
+    def insert(self, var: int):
+        self.grow(var)
+        if self.indices[var] >= 0:
+            return
+        self.indices[var] = len(self.heap)
+        self.heap.append(var)
+        self._sift_up(self.indices[var])
 
-    def pop(self):
+    def pop(self) -> int:
         if not self.heap:
-            raise Exception()
-        score, item = heapq.heappop(self.heap)
-        return item, score
+            raise IndexError("pop from empty VSIDS heap")
+        heap = self.heap
+        top = heap[0]
+        last = heap.pop()
+        self.indices[top] = -1
+        if heap:
+            heap[0] = last
+            self.indices[last] = 0
+            self._sift_down(0)
+        return top
+
+    def rebuild(self):
+        """ Restores the heap order after activities were changed directly """
+        for i in reversed(range(len(self.heap) // 2)):
+            self._sift_down(i)
 
     def decay_scores(self):
         self.var_inc *= (1 / self.decay_factor)
 
-    def update_score(self, item):
-        for i in range(len(self.heap)):
-            if self.heap[i][1] == item:
-                self.heap[i] = (self.heap[i][0] + self.var_inc, item)
-                heapq.heapify(self.heap)
+    def bump(self, var: int):
+        act = self.activity
+        act[var] += self.var_inc
+        if act[var] > 1e100:
+            # rescale everything so activities don't overflow; relative order is unchanged
+            for v in range(len(act)):
+                act[v] *= 1e-100
+            self.var_inc *= 1e-100
+        if self.indices[var] >= 0:
+            self._sift_up(self.indices[var])
+
+    def _sift_up(self, i: int):
+        heap, indices, act = self.heap, self.indices, self.activity
+        var = heap[i]
+        score = act[var]
+        while i > 0:
+            parent = (i - 1) >> 1
+            p_var = heap[parent]
+            if act[p_var] >= score:
+                break
+            heap[i] = p_var
+            indices[p_var] = i
+            i = parent
+        heap[i] = var
+        indices[var] = i
+
+    def _sift_down(self, i: int):
+        heap, indices, act = self.heap, self.indices, self.activity
+        n = len(heap)
+        var = heap[i]
+        score = act[var]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
                 break
+            if child + 1 < n and act[heap[child + 1]] > act[heap[child]]:
+                child += 1
+            c_var = heap[child]
+            if act[c_var] <= score:
+                break
+            heap[i] = c_var
+            indices[c_var] = i
+            i = child
+        heap[i] = var
+        indices[var] = i
 
 
-class Clause:
-    def __init__(self, clause: Set[int], learnt: bool) -> None:
-        self.lits = clause
-        self.learnt = learnt
+# Learnt clause tiers (by LBD): core clauses are kept forever, tier2 clauses while they keep
+# being used in conflicts, and local clauses compete on activity at every reduceDB.
+TIER_CORE = 0
+TIER_2 = 1
+TIER_LOCAL = 2
+CORE_LBD = 2
+TIER2_LBD = 6
 
-        i = iter(clause)
-        self.wa = next(i)
-        self.wb = next(i)
+# Phases installed by rephase(), in order: "original" is the initial all-False phase,
+# "best" the phases of the longest trail since the last rephase
+REPHASE_SCHEDULE = ("best", "original", "best", "inverted", "best", "random")
+
+
+def lbd_tier(lbd: int) -> int:
+    if lbd <= CORE_LBD:
+        return TIER_CORE
+    if lbd <= TIER2_LBD:
+        return TIER_2
+    return TIER_LOCAL
+
+
+# Why a var was assigned, as a single int: a cref (>= 0) for long clauses, NO_REASON for decisions, and
+# for binary clauses the other (False) literal of the clause packed into a value <= -2 (see binary_reason),
+# so binary implications need no clause in the arena.
+NO_REASON = -1
 
-    def __str__(self) -> str:
-        return f"{self.lits}"
 
-@dataclass
-class VarData:
-    cref: Optional[Clause]
-    dlevel: int
+def binary_reason(lit: int) -> int:
+    return -2 * lit if lit > 0 else 2 * lit - 1
+
+
+def binary_reason_lit(reason: int) -> int:
+    code = -reason
+    return -(code >> 1) if code & 1 else code >> 1
 
 
 class CDCLSolver:
-    def __init__(self, num_vars: int, num_clauses: int):
+    def __init__(self, num_vars: int, num_clauses: int, restart_policy: Optional[RestartPolicy] = None,
+                 rephase_interval: int = 1000):
         self.num_vars = num_vars
         self.num_clauses = num_clauses
         self.vars: Set[int] = set()
 
-        self.clauses: Set[Clause] = set()               # all clauses
-        self.learned_clauses: Set[Clause] = set()       # learned clauses
-        self.var_data: Dict[int, VarData] = {}          # data (implication clause + decision level) for each var
-        self.assignments: Dict[int, bool] = {}          # variable assignemnts
+        self.arena = ClauseArena()                      # literals of every clause with >= 3 literals
+        self.clauses: List[int] = []                    # crefs of the original clauses
+        self.learned_clauses: List[int] = []            # crefs of learned clauses (not binary ones, those are never deleted)
+        self.clause_activity: Dict[int, float] = {}     # cref --> activity, for learned clauses
+        self.binary_clauses: List[tuple[int, int]] = [] # all 2-literal clauses (original + learned)
+        self.ok = True                                  # False once the clauses are known to be UNSAT at level 0
+
+        # Per-variable / per-literal storage, preallocated from the DIMACS header.
+        # lit_value is indexed directly by the (signed) literal: positive literals land in
+        # [1, num_vars] and negative ones wrap around to the back half, so value() is a single read.
+        self.lit_value = array('b', bytes(2 * num_vars + 1))  # 1 = True, -1 = False, 0 = unassigned
+        self.level = array('i', bytes(4 * (num_vars + 1)))   # decision level of each var
+        self.reason = array('i', [NO_REASON]) * (num_vars + 1)  # why each var was assigned
         self.trail: list[int] = []                      # assignment history
-        self.propagation_q: list[int] = []              # queue of literals to propagate
+        self.trail_lim: list[int] = []                  # trail index at which each decision level starts
+        self.qhead = 0                                  # trail[qhead:] are the literals still to propagate
         self.dlevel = 0                                 # decision level
         
         # Watched literals
-        self.literal2watched: Dict[int, Set[Clause]] = {}  # literal --> Set of clauses that are watching literal
+        # literal --> flat list of (cref, blocker) pairs watching -literal, indexed like lit_value. The blocker is some
+        # other literal of the clause; if it is True the clause is skipped without looking at the clause itself.
+        self.literal2watched: List[List[int]] = [[] for _ in range(2 * num_vars + 1)]
+        # Binary implication graph: literal --> literals implied once it is True, indexed like lit_value
+        self.literal2implied: List[List[int]] = [[] for _ in range(2 * num_vars + 1)]
+        self.binary_conflict = self.arena.alloc([0, 0])  # reused to report conflicts on binary clauses
+        self.gc_fraction = 0.2                          # compact the arena once this fraction of it is deleted clauses
 
         # VSIDS
-        self.activity = VSIDSHeap()
-        self.polarity = {}
+        self.activity = VSIDSHeap(num_vars)
+        self.heuristic = "vsids"                        # decision method: vsids | branch_random_lit
+        self.use_ple = True                             # pure literal elimination in preprocess() (see eliminate_pure)
+        self.use_elim = True                            # SatELite preprocessing (elim.py) before the first search
+        self.elim_clauses: Dict[int, List[List[int]]] = {}  # eliminated var --> its clauses, for the model and reactivate
+        self.use_probing = True                         # failed literals + equivalent literals (probe.py) before that
+        self.equivalent: Dict[int, int] = {}            # substituted var --> the literal it is equivalent to
+        self.frozen: Set[int] = set()                   # vars that must not be eliminated/substituted (e.g. later assumptions)
+        self.sharing: Optional[ClauseSharing] = None   # set by parallel.py to exchange learnt clauses
+        self.polarity = array('b', bytes(num_vars + 1))  # saved phase for each var (1 = True, 0 = False)
+
+        # Rephasing (disabled if rephase_interval is 0)
+        self.best_phase = array('b', bytes(num_vars + 1))  # phases of the longest trail since the last rephase
+        self.best_trail_size = 0
+        self.rephase_interval = rephase_interval
+        self.next_rephase = rephase_interval
+        self.rephases = 0
+        self.rng = random.Random(0)
+
+        # Conflict analysis: seen[v] == stamp marks v for the current analyze() call, so nothing has to be cleared
+        self.seen = array('i', bytes(4 * (num_vars + 1)))
+        self.stamp = 0
+
+        # Restarts
+        self.restart_policy = restart_policy if restart_policy is not None else LubyRestarts()
+        self.simp_assigns = -1                          # level-0 assignments the last time preprocess ran
+
+        # Learnt clause DB reduction
+        self.conflicts = 0
+        self.cla_inc = 1.0
+        self.cla_decay = 0.999
+        self.reduce_interval = 2000                     # conflicts until the next reduceDB
+        self.reduce_inc = 300                           # the interval grows by this much after each reduceDB
+        self.next_reduce = self.reduce_interval
+
+        # Incremental solving
+        self.assumptions: List[int] = []                # literals the current solve() call assumes True
+        self.core: List[int] = []                       # after UNSAT under assumptions: the ones that failed together
+        self.solves = 0                                 # solve() calls so far
+        self.pure_literals = 0                          # vars eliminated by PLE so far
+
+        # Inprocessing at restarts (see inprocess.py; disabled if inprocess_fraction is 0)
+        self.inprocess_fraction = 0.1                   # at most this fraction of the time of a solve() call
+        self.next_inprocess = INPROCESS_INTERVAL
+        self.inprocess_time = 0.0                       # spent inprocessing in the current solve() call
+        self.solve_start = 0.0
+        self.ticks = 0                                  # propagation work so far: literals propagated + watchers visited
+        self.inprocess_ticks = 0                        # ticks at the end of the last round
+        self.new_learnts: List[int] = []                # crefs of the learnt clauses since the last round
+        self.vivify_cursor = 0                          # where the next round starts vivifying self.clauses
 
         # tracking stats
         self.function_stats: dict[str, FunctionStats] = {}
 
     def add_variable(self, literal: int):
-        self.activity.push(abs(literal), 0)
-        self.polarity[abs(literal)] = 0
-        self.vars.add(abs(literal))
-
-    def add_clause(self, clause: Set[int], learnt: bool = False) -> Optional[Clause]:
-        debug_print(f"Adding a {'learned ' if learnt else ''}clause: {clause}", self.dlevel)
-        for l in clause:
-            if -l in clause:
-                return
+        var = abs(literal)
+        if var > self.num_vars:
+            self.grow(var)
+        self.activity.insert(var)
+        self.vars.add(var)
+
+    # only needed for DIMACS files whose header undercounts the variables
+    def grow(self, num_vars: int):
+        extra = num_vars - self.num_vars
+        # lit_value keeps negative literals at the back, so rebuild it around the new midpoint
+        lit_value = array('b', bytes(2 * num_vars + 1))
+        for v in range(1, self.num_vars + 1):
+            lit_value[v] = self.lit_value[v]
+            lit_value[-v] = self.lit_value[-v]
+        self.lit_value = lit_value
+        literal2watched: List[List[int]] = [[] for _ in range(2 * num_vars + 1)]
+        for v in range(1, self.num_vars + 1):
+            literal2watched[v] = self.literal2watched[v]
+            literal2watched[-v] = self.literal2watched[-v]
+        self.literal2watched = literal2watched
+        literal2implied: List[List[int]] = [[] for _ in range(2 * num_vars + 1)]
+        for v in range(1, self.num_vars + 1):
+            literal2implied[v] = self.literal2implied[v]
+            literal2implied[-v] = self.literal2implied[-v]
+        self.literal2implied = literal2implied
+        self.level.extend([0] * extra)
+        self.reason.extend([NO_REASON] * extra)
+        self.polarity.extend([0] * extra)
+        self.best_phase.extend([0] * extra)
+        self.seen.extend([0] * extra)
+        self.num_vars = num_vars
+
+    def add_clause(self, clause: Collection[int], learnt: bool = False, lbd: int = 0) -> int:
+        """ Returns the cref of the new clause, or CREF_UNDEF if it doesn't go into the arena (len < 3)
 
+        Original clauses can be added after solve() too, over any vars: substituted ones are replaced by their
+        representative, and eliminated ones (by BVE or PLE) are brought back first (see reactivate). """
+        if DEBUG:
+            debug_print(f"Adding a {'learned ' if learnt else ''}clause: {clause}", self.dlevel)
+        if not learnt:
+            self.backtrackUntil(0)  # no-op unless a solve() came before
+            if self.equivalent:
+                clause = [self.representative(l) for l in clause]
+            for l in clause:
+                if abs(l) not in self.vars:
+                    if abs(l) in self.elim_clauses:
+                        self.reactivate(abs(l))
+                    else:
+                        self.add_variable(l)
+            for l in clause:
+                if -l in clause:
+                    return CREF_UNDEF
+            # level-0 assignments hold for good: a True literal satisfies the clause, False ones can go
+            if self.trail:
+                if any(self.value(l) == 1 for l in clause):
+                    return CREF_UNDEF
+                clause = [l for l in clause if self.value(l) == 0]
+        return self.store_clause(clause, learnt, lbd)
+
+    def store_clause(self, clause: Collection[int], learnt: bool = False, lbd: int = 0) -> int:
+        """ add_clause for a clause without tautologies or level-0 assigned literals over known vars """
         if len(clause) == 0:
-            return
+            self.ok = False
+            return CREF_UNDEF
         if len(clause) == 1:
-            self.enqueue(next(iter(clause)))
-            self.propagate()
-            return
+            # propagated by the solve loop, once every clause is watched
+            lit = next(iter(clause))
+            if self.value(lit) == 0:
+                self.enqueue(lit)
+            elif self.value(lit) == -1 and self.dlevel == 0:
+                self.ok = False
+            return CREF_UNDEF
+
+        if len(clause) == 2:
+            a, b = clause
+            self.binary_clauses.append((a, b))
+            self.literal2implied[-a].append(b)
+            self.literal2implied[-b].append(a)
+            return CREF_UNDEF
 
-        # len(clause) >= 2
-        clause_obj = Clause(clause, learnt=learnt)
+        # len(clause) >= 3
         if learnt:
-            # TODO: Bump clause activity
-            self.learned_clauses.add(clause_obj)
-            
-        self.clauses.add(clause_obj)
-        if -clause_obj.wa not in self.literal2watched:
-            self.literal2watched[-clause_obj.wa] = set()
-        if -clause_obj.wb not in self.literal2watched:
-            self.literal2watched[-clause_obj.wb] = set()
-            
-        self.literal2watched[-clause_obj.wa].add(clause_obj)
-        self.literal2watched[-clause_obj.wb].add(clause_obj)
-
-        return clause_obj
+            # analyze() puts the asserting literal first and the false literal with the highest dlevel second, so
+            # these are the watches; otherwise backtracking past that level leaves the clause unit without anything watching it
+            cref = self.arena.alloc(list(clause), learnt=True, lbd=lbd, tier=lbd_tier(lbd))
+            self.clause_activity[cref] = 0.0
+            self.bump_clause(cref)
+            self.learned_clauses.append(cref)
+        else:
+            cref = self.arena.alloc(list(clause))
+            self.clauses.append(cref)
+
+        self.attach_clause(cref)
+        return cref
+
+    def add_clauses_csr(self, lits, offsets):
+        """ Bulk add_clause for original clauses in CSR form (see csr.py), already free of duplicates and tautologies.
+        Only for loading: unlike add_clause, it doesn't simplify against assignments made by an earlier solve(). """
+        lits = lits.tolist()
+        offsets = offsets.tolist()
+        # same layout as ClauseArena.alloc, but written to the arena in one go
+        block: List[int] = []
+        base = len(self.arena)
+        literal2watched = self.literal2watched
+        for i in range(len(offsets) - 1):
+            start, end = offsets[i], offsets[i + 1]
+            if end - start < 3:
+                self.add_clause(lits[start:end])
+                continue
+            cref = base + len(block)
+            block += (end - start, 0, 0)
+            block += lits[start:end]
+            self.clauses.append(cref)
+            wa, wb = lits[start], lits[start + 1]
+            watchers = literal2watched[-wa]
+            watchers.append(cref)
+            watchers.append(wb)
+            watchers = literal2watched[-wb]
+            watchers.append(cref)
+            watchers.append(wa)
+        self.arena.data.extend(block)
+
+    def attach_clause(self, cref: int):
+        wa, wb = self.arena.data[cref + HEADER], self.arena.data[cref + HEADER + 1]
+        watchers = self.literal2watched[-wa]
+        watchers.append(cref)
+        watchers.append(wb)
+        watchers = self.literal2watched[-wb]
+        watchers.append(cref)
+        watchers.append(wa)
+
+    def remove_clauses(self, crefs: List[int]):
+        """ Deletes clauses from the arena and detaches them from their watch lists """
+        if not crefs:
+            return
+        dirty: Set[int] = set()
+        data = self.arena.data
+        for cref in crefs:
+            first = data[cref + HEADER]
+            if self.reason[abs(first)] == cref and self.value(first) == 1:
+                # only happens at level 0 (reduceDB never deletes reasons), where reasons aren't needed
+                assert self.level[abs(first)] == 0
+                self.reason[abs(first)] = NO_REASON
+            self.arena.free(cref)
+            self.clause_activity.pop(cref, None)
+            dirty.add(-first)
+            dirty.add(-data[cref + HEADER + 1])
+
+        for lit in dirty:
+            watchers = self.literal2watched[lit]
+            j = 0
+            for i in range(0, len(watchers), 2):
+                if not data[watchers[i] + 1] & DELETED:
+                    watchers[j] = watchers[i]
+                    watchers[j + 1] = watchers[i + 1]
+                    j += 2
+            del watchers[j:]
+
+        if self.arena.wasted > self.gc_fraction * len(self.arena):
+            self.garbage_collect()
+
+    @track_call_and_time
+    def garbage_collect(self):
+        """ Compacts the arena and relocates every cref that points into it """
+        debug_print(f"Collecting {self.arena.wasted} wasted words out of {len(self.arena)}", self.dlevel)
+        old = self.arena.collect()  # old[cref + 2] is now the new cref of every surviving clause
+
+        for watchers in self.literal2watched:
+            j = 0
+            for i in range(0, len(watchers), 2):
+                cref = watchers[i]
+                if not old[cref + 1] & DELETED:
+                    watchers[j] = old[cref + 2]
+                    watchers[j + 1] = watchers[i + 1]
+                    j += 2
+            del watchers[j:]
+        for lit in self.trail:
+            cref = self.reason[abs(lit)]
+            if cref >= 0:
+                self.reason[abs(lit)] = old[cref + 2]
+        self.clauses = [old[cref + 2] for cref in self.clauses if not old[cref + 1] & DELETED]
+        self.learned_clauses = [old[cref + 2] for cref in self.learned_clauses if not old[cref + 1] & DELETED]
+        self.clause_activity = {old[cref + 2]: act for cref, act in self.clause_activity.items()}
+        self.new_learnts = [old[cref + 2] for cref in self.new_learnts if not old[cref + 1] & DELETED]
+        self.binary_conflict = old[self.binary_conflict + 2]
+
+    @track_call_and_time
+    def eliminate(self, frozen: Set[int]) -> bool:
+        """ Subsumption, self-subsuming strengthening and bounded variable elimination on the original clauses
+        (see elim.py), then rebuilds the clause DB from the result. Only before any learnt clause exists. Returns False
+        if the clauses are UNSAT. """
+        assert self.dlevel == 0 and not self.learned_clauses
+        simplifier = Simplifier(self, frozen)
+        ok = simplifier.run()
+        for name, count in (("eliminated_vars", len(simplifier.eliminated)), ("subsumed", simplifier.subsumed),
+                            ("strengthened", simplifier.strengthened), ("resolvents", simplifier.added)):
+            self.function_stats[name] = FunctionStats(count)
+        if not ok:
+            return False
+        debug_print(f"Eliminated {len(simplifier.eliminated)} vars, subsumed {simplifier.subsumed} clauses", self.dlevel)
+        self.elim_clauses.update(simplifier.eliminated)
+        self.rebuild_clauses(simplifier.remaining())
+        self.remove_vars(simplifier.eliminated)
+        return self.ok
+
+    @track_call_and_time
+    def probe(self, frozen: Set[int]) -> bool:
+        """ Failed-literal probing, then equivalent-literal substitution (see probe.py). Only before any learnt clause
+        exists. Returns False if the clauses are UNSAT. """
+        assert self.dlevel == 0 and not self.learned_clauses
+        steps = max(PROBE_MIN_STEPS, PROBE_STEPS_PER_CLAUSE * (len(self.clauses) + len(self.binary_clauses)))
+        ok, failed, necessary = probe_failed_literals(self, steps)
+        self.function_stats["failed_literals"] = FunctionStats(failed)
+        self.function_stats["necessary_assignments"] = FunctionStats(necessary)
+        if not ok:
+            return False
+        equivalent = equivalent_literals(self, frozen)
+        if equivalent is None:
+            return False
+        self.function_stats["equivalent_vars"] = FunctionStats(len(equivalent))
+        debug_print(f"Probing: {failed} failed literals, {necessary} necessary assignments, {len(equivalent)} "
+                    f"equivalent vars", self.dlevel)
+        if equivalent:
+            self.equivalent.update(equivalent)
+            self.rebuild_clauses(substitute(self, equivalent))
+            self.remove_vars(equivalent)
+        return self.ok
+
+    def rebuild_clauses(self, clauses: List[List[int]]):
+        """ Replaces the original clauses (there are no learnt ones yet) by clauses, which are already simplified
+        against the level-0 assignments """
+        # level-0 reasons are never looked at, so every clause can go
+        for lit in self.trail:
+            self.reason[abs(lit)] = NO_REASON
+        self.qhead = len(self.trail)
+        self.arena = ClauseArena()
+        self.binary_conflict = self.arena.alloc([0, 0])
+        self.clauses = []
+        self.binary_clauses = []
+        self.literal2watched = [[] for _ in range(len(self.literal2watched))]
+        self.literal2implied = [[] for _ in range(len(self.literal2implied))]
+        lits, offsets = array('i'), array('i', [0])
+        for clause in clauses:
+            lits.extend(clause)
+            offsets.append(len(lits))
+        self.add_clauses_csr(lits, offsets)
+
+    def remove_vars(self, removed: Collection[int]):
+        """ Eliminated and substituted vars are never decided on """
+        self.vars.difference_update(removed)
+        heap = self.activity
+        for var in heap.heap:
+            heap.indices[var] = -1
+        heap.heap = [var for var in heap.heap if var not in removed]
+        for i, var in enumerate(heap.heap):
+            heap.indices[var] = i
+        heap.rebuild()
+
+    def representative(self, lit: int) -> int:
+        rep = self.equivalent.get(abs(lit))
+        if rep is None:
+            return lit
+        return rep if lit > 0 else -rep
+
+    def reactivate(self, var: int):
+        """ Brings back an eliminated or substituted var, as CaDiCaL does: the clauses saved when it was eliminated (or
+        the two binaries of its equivalence) are added again, along with those of every other eliminated var in
+        them. The formula stays the same, but the var can be decided, assumed and added in clauses again. """
+        restored: List[List[int]] = []
+        todo = [var]
+        count = 0
+        while todo:
+            v = todo.pop()
+            if v in self.equivalent:
+                rep = self.equivalent.pop(v)
+                clauses = [[v, -rep], [-v, rep]]
+            elif v in self.elim_clauses:
+                clauses = self.elim_clauses.pop(v)
+            else:  # already brought back
+                continue
+            count += 1
+            self.add_variable(v)
+            for clause in clauses:
+                todo.extend(abs(l) for l in clause if abs(l) in self.elim_clauses)
+            restored += clauses
+        self.count_stat("reactivated_vars", count)
+        for clause in restored:
+            self.add_clause(clause)
 
     # PLE, removal of true clauses under current assignment
     def preprocess(self):
         debug_print("Calling preprocess...", self.dlevel)
         assert self.dlevel == 0
         
-        if self.propagate():
+        if self.propagate() != CREF_UNDEF:
             return False
+        # nothing new at level 0 since last time (e.g. we got here from a restart)
+        if len(self.trail) == self.simp_assigns:
+            return True
         
-        literal2clause = {}
-        for c in self.clauses:
-            for l in c.lits:
-                if l not in literal2clause:
-                    literal2clause[l] = set()
-                literal2clause[l].add(c)
-                
-        # TODO: Speed-up!
-        for l in literal2clause:
-            if -l not in literal2clause:
-                # easier just to assign manually, rather than using enqueue (since we are gauranteed to be at level 0 here)
-                self.enqueue(l)
-
-        # TODO: Speed-up!
-        new_clauses = set()
-        for c in self.clauses:
-            if not self.is_clause_sat(c):
-                new_clauses.add(c)
-        self.clauses = new_clauses
+        self.remove_satisfied()
+        if self.use_ple:
+            self.eliminate_pure()
+        self.simp_assigns = len(self.trail)
         return True
 
-    def enqueue(self, lit: int, cref: Optional[Clause] = None):
-        debug_print(f"Calling enqueue with {lit}", self.dlevel)
+    def eliminate_pure(self):
+        """ Pure literal elimination, done as a variable elimination without resolvents: the clauses of a var that
+        occurs in one polarity only go into elim_clauses and model() satisfies them. Assigning the pure literal
+        instead would be a level-0 fact the formula doesn't imply, which clauses added later could contradict. At
+        level 0, once the satisfied clauses are gone. """
+        occurs: Set[int] = set()
+        for cref in self.clauses:
+            occurs.update(self.arena.lits(cref))
+        for a, b in self.binary_clauses:
+            if self.value(a) != 1 and self.value(b) != 1:
+                occurs.add(a)
+                occurs.add(b)
+        frozen = self.frozen.union(abs(l) for l in self.assumptions)
+        pure = {abs(l) for l in occurs if -l not in occurs and self.value(l) == 0 and abs(l) not in frozen}
+        if not pure:
+            return
+
+        # every clause goes with its first pure var; satisfied binaries may have the other polarity, which is fine
+        for var in pure:
+            self.elim_clauses[var] = []
+        removed = []
+        for cref in self.clauses:
+            lits = self.arena.lits(cref)
+            var = next((abs(l) for l in lits if abs(l) in pure), 0)
+            if var:
+                self.elim_clauses[var].append(lits.tolist())
+                removed.append(cref)
+        binary_clauses = []
+        for a, b in self.binary_clauses:
+            var = abs(a) if abs(a) in pure else abs(b) if abs(b) in pure else 0
+            if var:
+                self.elim_clauses[var].append([a, b])
+                self.literal2implied[-a].remove(b)
+                self.literal2implied[-b].remove(a)
+            else:
+                binary_clauses.append((a, b))
+        self.binary_clauses = binary_clauses
+        # learnt clauses with the var can go: they are redundant
+        learnts = [cref for cref in self.learned_clauses if any(abs(l) in pure for l in self.arena.lits(cref))]
+        if removed:
+            removed_set = set(removed)
+            self.clauses = [cref for cref in self.clauses if cref not in removed_set]
+        if learnts:
+            learnts_set = set(learnts)
+            self.learned_clauses = [cref for cref in self.learned_clauses if cref not in learnts_set]
+        self.remove_clauses(removed + learnts)
+        self.remove_vars(pure)
+        self.pure_literals += len(pure)
+
+    def remove_satisfied(self) -> int:
+        """ Removes the clauses that are satisfied for good (at level 0); returns how many """
+        satisfied = [cref for cref in self.clauses if self.is_clause_sat(self.arena.lits(cref))]
+        satisfied += [cref for cref in self.learned_clauses if self.is_clause_sat(self.arena.lits(cref))]
+        if satisfied:
+            self.clauses = [cref for cref in self.clauses if not self.is_clause_sat(self.arena.lits(cref))]
+            self.learned_clauses = [cref for cref in self.learned_clauses if not self.is_clause_sat(self.arena.lits(cref))]
+            self.remove_clauses(satisfied)
+        return len(satisfied)
+
+    @track_call_and_time
+    def inprocess(self, deadline: float):
+        """ One round of vivification, subsumption by the new learnt clauses and removal of satisfied clauses (see
+        inprocess.py), at level 0, cut short once time.time() passes deadline. Sets ok = False if the clauses turn
+        out to be UNSAT. """
+        assert self.dlevel == 0
+        start = time.time()
+        if self.propagate() != CREF_UNDEF:
+            self.ok = False
+            return
+        self.count_stat("inprocess_satisfied", self.remove_satisfied())
+
+        # backtracking saves phases, and vivification assignments shouldn't steer the search
+        polarity = array('b', self.polarity)
+        best_phase, best_trail_size = array('b', self.best_phase), self.best_trail_size
+        steps = max(VIVIFY_MIN_STEPS, int(VIVIFY_EFFORT * (self.ticks - self.inprocess_ticks)))
+        removed: Set[int] = set()
+        # each pass gets a share of the time, so that the first one can't leave nothing for the others
+        truncated = False
+        learnts_deadline = start + VIVIFY_LEARNTS_SHARE * (deadline - start)
+        vivify_deadline = start + VIVIFY_SHARE * (deadline - start)
+        learnts = [cref for cref in self.new_learnts if self.arena.tier(cref) <= TIER_2]
+        _, steps = vivify(self, learnts, steps, removed, learnts_deadline)
+        truncated |= time.time() > learnts_deadline
+        if self.ok and steps > 0 and self.clauses:
+            first = self.vivify_cursor % len(self.clauses)
+            visited, steps = vivify(self, self.clauses[first:] + self.clauses[:first], steps, removed, vivify_deadline)
+            self.vivify_cursor = first + visited
+            truncated |= time.time() > vivify_deadline
+        self.polarity = polarity
+        self.best_phase, self.best_trail_size = best_phase, best_trail_size
+        if self.ok and self.propagate() != CREF_UNDEF:
+            self.ok = False
+        if not self.ok:
+            return
+
+        promoted = subsume(self, self.new_learnts, removed, deadline)
+        truncated |= time.time() > deadline
+        if removed or promoted:
+            self.clauses = [cref for cref in self.clauses if cref not in removed] + promoted
+            promoted_set = set(promoted)
+            self.learned_clauses = [cref for cref in self.learned_clauses
+                                    if cref not in removed and cref not in promoted_set]
+            for cref in promoted:
+                self.clause_activity.pop(cref, None)
+            self.remove_clauses(list(removed))
+        self.count_stat("inprocess_satisfied", self.remove_satisfied())
+        debug_print(f"Inprocessing removed {len(removed)} clauses", self.dlevel)
+        if truncated:
+            self.count_stat("inprocess_truncated", 1)
+
+        self.new_learnts = []
+        self.inprocess_ticks = self.ticks
+        self.next_inprocess = self.conflicts + INPROCESS_INTERVAL
+        self.inprocess_time += time.time() - start
+
+    def count_stat(self, name: str, count: int):
+        self.function_stats.setdefault(name, FunctionStats()).count += count
+
+    def enqueue(self, lit: int, cref: int = NO_REASON):
+        if DEBUG:
+            debug_print(f"Calling enqueue with {lit}", self.dlevel)
         var = abs(lit)
-        self.assignments[var] = True if lit > 0 else False
-        self.var_data[var] = VarData(cref=cref, dlevel=self.dlevel)
+        self.lit_value[lit] = 1
+        self.lit_value[-lit] = -1
+        self.level[var] = self.dlevel
+        self.reason[var] = cref
         self.trail.append(lit)
-        self.propagation_q.append(lit)
-
-    def propagate(self) -> Optional[Clause]:
-        debug_print(f"Calling propagate with prop q: {self.propagation_q}", self.dlevel)
-        while self.propagation_q:
-            prop_lit = self.propagation_q.pop(0)
-            debug_print(f"Propagating {prop_lit}", self.dlevel)
-            
+
+    def new_decision_level(self):
+        self.trail_lim.append(len(self.trail))
+        self.dlevel += 1
+
+    def propagate(self) -> int:
+        """ Returns the cref of a conflicting clause, or CREF_UNDEF """
+        if DEBUG:  # slicing and formatting the queue on every call adds up, even when nothing is printed
+            debug_print(f"Calling propagate with prop q: {self.trail[self.qhead:]}", self.dlevel)
+        trail = self.trail
+        lit_value = self.lit_value
+        literal2watched = self.literal2watched
+        literal2implied = self.literal2implied
+        data = self.arena.data
+        while self.qhead < len(trail):
+            prop_lit = trail[self.qhead]
+            self.qhead += 1
+            if DEBUG:
+                debug_print(f"Propagating {prop_lit}", self.dlevel)
+
             false_prop_lit = -prop_lit
-            if prop_lit not in self.literal2watched: # no clauses are watching the negated propagating literal
-                continue
-                
-            watched_clauses = self.literal2watched[prop_lit]
-            wc_to_remove = []
-
-            # find new watched literal
-            for wc in watched_clauses:
-                debug_print(f"Watched clause: {wc}", self.dlevel)
-                debug_print(f"W1: {wc.wa}; W2: {wc.wb}", self.dlevel)
-                assert false_prop_lit == wc.wa or false_prop_lit == wc.wb
-                if (wc.wa == false_prop_lit):  # WLOG, assume that the false watched literal is wc.wb
-                    wc.wa = wc.wb
-                    wc.wb = false_prop_lit
-
-                if self.value(wc.wa) == 1 or self.value(wc.wb) == 1:
+
+            # binary clauses first: no clause to visit, the reason is just false_prop_lit
+            implied_list = literal2implied[prop_lit]
+            if implied_list:
+                bin_reason = binary_reason(false_prop_lit)
+                for implied in implied_list:
+                    val = lit_value[implied]
+                    if val == 1:
+                        continue
+                    if val == -1:  # conflict
+                        if DEBUG:
+                            debug_print(f"Conflict identified: binary clause {implied, false_prop_lit} is False", self.dlevel)
+                        data[self.binary_conflict + HEADER] = implied
+                        data[self.binary_conflict + HEADER + 1] = false_prop_lit
+                        self.qhead = len(trail)
+                        return self.binary_conflict
+                    self.enqueue(implied, bin_reason)
+
+            watchers = literal2watched[prop_lit]
+            # watchers[:j] are the entries kept so far; entries that move to a new literal are dropped by compaction
+            i = j = 0
+            n = len(watchers)
+            self.ticks += 1 + (n >> 1)
+            while i < n:
+                cref = watchers[i]
+                blocker = watchers[i + 1]
+                i += 2
+                if lit_value[blocker] == 1:
+                    watchers[j] = cref
+                    watchers[j + 1] = blocker
+                    j += 2
                     continue
 
-                new_watcher_found = False
-                for lit in wc.lits:
-                    if lit != wc.wb and lit != wc.wa and self.value(lit) >= 0:  # unassigned | True
-                        wc.wb = lit
-                        if -wc.wb not in self.literal2watched:
-                            self.literal2watched[-wc.wb] = set()
-                        self.literal2watched[-wc.wb].add(wc)
-                        new_watcher_found = True
-                        wc_to_remove.append(wc)  # FIXME: Speed-up
-                        debug_print(f"Found new watched literal {lit}", self.dlevel)
-                        break
+                # WLOG, make the false watched literal lit_1
+                start = cref + HEADER
+                first = data[start]
+                if first == false_prop_lit:
+                    first = data[start + 1]
+                    data[start] = first
+                    data[start + 1] = false_prop_lit
+                if first != blocker and lit_value[first] == 1:
+                    watchers[j] = cref
+                    watchers[j + 1] = first
+                    j += 2
+                    continue
 
-                if not new_watcher_found:
-                    if self.value(wc.wa) == -1:  # conflict
-                        debug_print(f"Conflict identified: {wc} is False", self.dlevel)
-                        for c in wc_to_remove:
-                            self.literal2watched[prop_lit].remove(c)
-                        return wc
-                    else:  # propagate
-                        self.enqueue(wc.wa, wc)
+                # find new watched literal (unassigned | True)
+                for k in range(start + 2, start + data[cref]):
+                    lit = data[k]
+                    if lit_value[lit] != -1:
+                        data[start + 1] = lit
+                        data[k] = false_prop_lit
+                        new_watchers = literal2watched[-lit]
+                        new_watchers.append(cref)
+                        new_watchers.append(first)
+                        if DEBUG:
+                            debug_print(f"Found new watched literal {lit}", self.dlevel)
+                        break
+                else:
+                    watchers[j] = cref
+                    watchers[j + 1] = first
+                    j += 2
+                    if lit_value[first] == -1:  # conflict
+                        if DEBUG:
+                            debug_print(f"Conflict identified: {self.arena.lits(cref).tolist()} is False", self.dlevel)
+                        while i < n:
+                            watchers[j] = watchers[i]
+                            j += 1
+                            i += 1
+                        del watchers[j:]
+                        self.qhead = len(trail)
+                        return cref
+                    self.enqueue(first, cref)  # propagate
 
-            for c in wc_to_remove:
-                self.literal2watched[prop_lit].remove(c)
+            del watchers[j:]
+        return CREF_UNDEF
 
     def backtrackUntil(self, dlevel: int):
         debug_print(f"Calling backtrack until level {dlevel}...", self.dlevel)
-        debug_print(f"Trail: {self.trail}", self.dlevel)
-        # remove assignments until the specified level & maintain proper dlevel and trail
-        while self.dlevel > dlevel:
-            if dlevel == 0 and not self.trail:
-                self.dlevel = 0
-                break
-            lit = self.trail[-1]
+        if DEBUG:  # formatting the whole trail isn't free, even when nothing is printed
+            debug_print(f"Trail: {self.trail}", self.dlevel)
+        if self.dlevel <= dlevel:
+            return
+
+        if len(self.trail) > self.best_trail_size:
+            self.best_trail_size = len(self.trail)
+            for lit in self.trail:
+                self.best_phase[abs(lit)] = lit > 0
+
+        # everything past the start of level dlevel + 1 gets unassigned; the queue is just the trail suffix, so it needs no extra bookkeeping
+        lim = self.trail_lim[dlevel]
+        lit_value = self.lit_value
+        polarity = self.polarity
+        for i in range(len(self.trail) - 1, lim - 1, -1):
+            lit = self.trail[i]
             var = abs(lit)
-            curr_dlevel = self.var_data[var].dlevel
-            self.dlevel = curr_dlevel
-            
-            debug_print(f"Var: {var}, Level: {curr_dlevel}", self.dlevel)
-            
-            #  TODO: Fudge with "var order"?
-            if self.dlevel > dlevel:
-                del self.assignments[var]
-                self.trail.pop()
-                self.activity.push(lit, 0)
-                if self.propagation_q:
-                    assert lit == self.propagation_q.pop()
+            lit_value[lit] = 0
+            lit_value[-lit] = 0
+            polarity[var] = lit > 0  # phase saving
+            self.activity.insert(var)  # no-op if var is still in the heap
+        del self.trail[lim:]
+        del self.trail_lim[dlevel:]
+        self.qhead = lim
+        self.dlevel = dlevel
+
+        if DEBUG:
+            debug_print(f"New trail: {self.trail}", self.dlevel)
+
+    def bump_clause(self, cref: int):
+        self.clause_activity[cref] += self.cla_inc
+        if self.clause_activity[cref] > 1e20:
+            for c in self.clause_activity:
+                self.clause_activity[c] *= 1e-20
+            self.cla_inc *= 1e-20
+
+    def is_locked(self, cref: int) -> bool:
+        # the reason for a current assignment (implied literals are always lit_0)
+        first = self.arena.data[cref + HEADER]
+        return self.reason[abs(first)] == cref and self.value(first) == 1
+
+    @track_call_and_time
+    def reduceDB(self):
+        arena = self.arena
+        # tier2 clauses that haven't taken part in a conflict since the last reduction become local
+        local = []
+        kept = []
+        for cref in self.learned_clauses:
+            if arena.tier(cref) == TIER_2 and not arena.is_used(cref):
+                arena.set_tier(cref, TIER_LOCAL)
+            arena.set_used(cref, False)
+            if arena.tier(cref) == TIER_LOCAL:
+                local.append(cref)
             else:
-                break
+                kept.append(cref)
 
-        # TODO: Propagation queue! need to update this/.
-        debug_print(f"New assignments: {self.assignments}", self.dlevel)
-        debug_print(f"New trail: {self.trail}", self.dlevel)
-        debug_print(f"New prop q: {self.propagation_q}", self.dlevel)
- 
-    def analyze(self, confl: Clause):
-        debug_print(f"Calling analyze on {confl.lits}", self.dlevel)
-        out_learnt_lits = set()
+        # delete the least active half of the local tier, but never a current reason
+        local.sort(key=self.clause_activity.__getitem__)
+        to_delete = len(local) // 2
+        deleted = []
+        for i, cref in enumerate(local):
+            if i < to_delete and not self.is_locked(cref):
+                deleted.append(cref)
+            else:
+                kept.append(cref)
+        self.learned_clauses = kept
+        self.remove_clauses(deleted)
+
+        debug_print(f"reduceDB deleted {len(deleted)} clauses", self.dlevel)
+        self.reduce_interval += self.reduce_inc
+        self.next_reduce = self.conflicts + self.reduce_interval
+
+    @track_call_and_time
+    def restart(self):
+        debug_print(f"Restarting after {self.restart_policy.conflicts} conflicts", self.dlevel)
+        if "conflicts_between_restarts" not in self.function_stats:
+            self.function_stats["conflicts_between_restarts"] = FunctionStats()
+        self.function_stats["conflicts_between_restarts"].count += self.restart_policy.conflicts
+        self.backtrackUntil(0)
+        self.restart_policy.on_restart()
+        if self.sharing is not None:
+            self.import_shared()
+            if not self.ok:
+                return
+        if self.inprocess_fraction and self.conflicts >= self.next_inprocess:
+            now = time.time()
+            allowed = self.inprocess_fraction * (now - self.solve_start) - self.inprocess_time
+            if allowed > 0:
+                self.inprocess(now + allowed)
+            else:  # over the time share: skip this round
+                self.count_stat("inprocess_skipped", 1)
+                self.new_learnts = []
+                self.next_inprocess = self.conflicts + INPROCESS_INTERVAL
+
+    def import_shared(self):
+        """ Adds the clauses other workers exported since the last restart. We are at level 0, so false literals
+        can be dropped for good and the rest are unassigned, which makes any two of them valid watches. """
+        assert self.dlevel == 0
+        for lits in self.sharing.collect():
+            if any(self.value(l) == 1 for l in lits):
+                continue
+            if any(abs(l) in self.elim_clauses or abs(l) in self.equivalent for l in lits):
+                continue  # another worker kept a var this one simplified away; the model wouldn't respect the clause
+            lits = [l for l in lits if self.value(l) == 0]
+            self.add_clause(lits, learnt=True, lbd=min(len(lits), TIER2_LBD))
+            if not self.ok:
+                return
+
+    @track_call_and_time
+    def rephase(self):
+        kind = REPHASE_SCHEDULE[self.rephases % len(REPHASE_SCHEDULE)]
+        debug_print(f"Rephasing: {kind}", self.dlevel)
+        size = len(self.polarity)
+        if kind == "best":
+            self.polarity = array('b', self.best_phase)
+        elif kind == "original":
+            self.polarity = array('b', bytes(size))
+        elif kind == "inverted":
+            self.polarity = array('b', [1]) * size
+        else:
+            self.polarity = array('b', (self.rng.getrandbits(1) for _ in range(size)))
+        self.best_trail_size = 0
+        self.rephases += 1
+        self.next_rephase = self.conflicts + self.rephase_interval * (self.rephases + 1)
+
+    def compute_lbd(self, lits) -> int:
+        return len({self.level[abs(l)] for l in lits})
+
+    def reason_lits(self, reason: int) -> Sequence[int]:
+        if reason >= 0:
+            data = self.arena.data
+            start = reason + HEADER
+            return data[start:start + data[reason]]
+        return (binary_reason_lit(reason),)
+
+    def analyze(self, confl: int) -> tuple[int, List[int], int]:
+        """ 1-UIP conflict analysis followed by recursive minimization. The learnt clause starts with the
+        asserting literal, followed by the literal with the highest dlevel among the rest (the backtrack level). """
+        arena = self.arena
+        if DEBUG:
+            debug_print(f"Calling analyze on {arena.lits(confl).tolist()}", self.dlevel)
+        self.stamp += 1
+        stamp = self.stamp
+        seen = self.seen
+        level = self.level
+        trail = self.trail
+        out_learnt_lits = [0]  # slot 0 is filled with the asserting literal at the end
         counter = 0
-        confl_cl = confl
-        seen = {}
         p_lit = None
-        bt_count = 0
+        index = len(trail) - 1
 
+        reason = confl
         while True:
-            assert confl_cl
-            
-            # TODO: Bump clause activity
-            debug_print(f"Conflict Clause: {confl_cl.lits}, P_lit: {p_lit}", self.dlevel)
-            for l in confl_cl.lits:
+            confl_lits = self.reason_lits(reason)
+            if reason >= 0 and arena.data[reason + 1] & LEARNT:
+                self.bump_clause(reason)
+                arena.set_used(reason, True)
+                if arena.tier(reason) != TIER_CORE:
+                    # the clause may have become more useful (lower LBD) since it was learnt
+                    lbd = self.compute_lbd(confl_lits)
+                    if lbd < arena.lbd(reason):
+                        arena.set_lbd(reason, lbd)
+                        arena.set_tier(reason, min(arena.tier(reason), lbd_tier(lbd)))
+            if DEBUG:
+                debug_print(f"Conflict Clause: {list(confl_lits)}, P_lit: {p_lit}", self.dlevel)
+            # p_lit itself is already seen, so it is skipped in its own reason
+            for l in confl_lits:
                 v = abs(l)
-                q_var_data = self.var_data[v]
-                if v not in seen:
-                    # TODO: Bump variable activity 
-                    self.activity.update_score(v)
-                    seen[v] = True
-                    if q_var_data.dlevel >= self.dlevel:
+                if seen[v] != stamp and level[v] > 0:
+                    self.activity.bump(v)
+                    seen[v] = stamp
+                    if level[v] >= self.dlevel:
                         counter += 1
-                    elif q_var_data.dlevel > 0:
-                        out_learnt_lits.add(l)
-            while True:
-                p_lit = self.trail[-1 - bt_count]
-                bt_count += 1
-                p_var = abs(p_lit)
-                confl_cl = self.var_data[p_var].cref
-                if p_var in seen:
-                    break
+                    else:
+                        out_learnt_lits.append(l)
+            # next seen literal on the trail
+            while seen[abs(trail[index])] != stamp:
+                index -= 1
+            p_lit = trail[index]
+            index -= 1
             counter -= 1
             if counter <= 0:
-                debug_print(f"COUNTER: {counter}, breaking", self.dlevel)
+                if DEBUG:
+                    debug_print(f"COUNTER: {counter}, breaking", self.dlevel)
                 break
+            reason = self.reason[abs(p_lit)]
+            assert reason != NO_REASON
+        out_learnt_lits[0] = -p_lit
+
+        # drop literals implied by the rest of the clause
+        if len(out_learnt_lits) > 2:
+            abstract_levels = 0
+            for i in range(1, len(out_learnt_lits)):
+                abstract_levels |= 1 << (level[abs(out_learnt_lits[i])] & 31)
+            j = 1
+            for i in range(1, len(out_learnt_lits)):
+                l = out_learnt_lits[i]
+                if self.reason[abs(l)] == NO_REASON or not self.lit_redundant(l, abstract_levels):
+                    out_learnt_lits[j] = l
+                    j += 1
+            if "minimized_literals" not in self.function_stats:
+                self.function_stats["minimized_literals"] = FunctionStats()
+            self.function_stats["minimized_literals"].count += len(out_learnt_lits) - j
+            del out_learnt_lits[j:]
 
         # if learned clause is unit, backtrack to 0 and propagate the literal
         # otherwise, backtrack to the 2nd highest decision level in the learnt clause (i.e. max dlevel of all literals excluding p_lit)
         out_btlevel = 0
-        if len(out_learnt_lits) > 0:
-            debug_print(f"Out_learnt_lits: {out_learnt_lits}", self.dlevel)
-            for l in out_learnt_lits:
-                v = abs(l)
-                q_var_data = self.var_data[v]
-                out_btlevel = max(out_btlevel, q_var_data.dlevel)
-        
-        out_learnt_lits.add(-p_lit)
-        debug_print(f"Out_btlevel: {out_btlevel}, P_lit_dlevel: {self.var_data[abs(p_lit)].dlevel}, P_lit: {p_lit}", self.dlevel)
-        if self.var_data[abs(p_lit)].dlevel > 0:
-            assert self.var_data[abs(p_lit)].dlevel > out_btlevel
-        
-        debug_print(f"Out_btlevel: {out_btlevel}, Out_learnt_lits: {out_learnt_lits}", self.dlevel)
-        
+        if len(out_learnt_lits) > 1:
+            max_i = 1
+            for i in range(2, len(out_learnt_lits)):
+                if level[abs(out_learnt_lits[i])] > level[abs(out_learnt_lits[max_i])]:
+                    max_i = i
+            out_learnt_lits[1], out_learnt_lits[max_i] = out_learnt_lits[max_i], out_learnt_lits[1]
+            out_btlevel = level[abs(out_learnt_lits[1])]
+
+        assert level[abs(p_lit)] > out_btlevel
+        if DEBUG:
+            debug_print(f"Out_btlevel: {out_btlevel}, P_lit_dlevel: {level[abs(p_lit)]}, P_lit: {p_lit}", self.dlevel)
+            debug_print(f"Out_btlevel: {out_btlevel}, Out_learnt_lits: {out_learnt_lits}", self.dlevel)
+
         return out_btlevel, out_learnt_lits, -p_lit
 
+    def analyze_final(self, lit: int) -> List[int]:
+        """ lit is an assumption that is False: returns it together with the assumptions (the decisions above level 0,
+        since no other decision has been made yet) that led to -lit """
+        core = [lit]
+        if self.level[abs(lit)] == 0:
+            return core
+        self.stamp += 1
+        stamp = self.stamp
+        seen = self.seen
+        level = self.level
+        seen[abs(lit)] = stamp
+        for i in range(len(self.trail) - 1, self.trail_lim[0] - 1, -1):
+            p = self.trail[i]
+            if seen[abs(p)] != stamp:
+                continue
+            reason = self.reason[abs(p)]
+            if reason == NO_REASON:
+                core.append(p)
+            else:
+                for q in self.reason_lits(reason):
+                    if level[abs(q)] > 0:
+                        seen[abs(q)] = stamp
+        return core
+
+    def lit_redundant(self, lit: int, abstract_levels: int) -> bool:
+        """ True if lit is implied by the other literals of the learnt clause (i.e. by the seen literals), in which
+        case it can be dropped (MiniSat's litRedundant). abstract_levels is a bitmask of the clause's decision levels:
+        a literal from any other level can't be implied by the clause, so the search stops there right away. """
+        seen, level, stamp = self.seen, self.level, self.stamp
+        stack = [lit]
+        marked = []  # vars marked while exploring, unmarked again if lit turns out not to be redundant
+        while stack:
+            for l in self.reason_lits(self.reason[abs(stack.pop())]):
+                v = abs(l)
+                if seen[v] == stamp or level[v] == 0:
+                    continue
+                if self.reason[v] != NO_REASON and (1 << (level[v] & 31)) & abstract_levels:
+                    seen[v] = stamp
+                    stack.append(l)
+                    marked.append(v)
+                else:
+                    for m in marked:
+                        seen[m] = 0
+                    return False
+        return True
+
+    def set_seed(self, seed: int):
+        """ Diversifies the search (e.g. for portfolio runs): random initial phases and a random initial variable
+        order, plus a reseeded rng for random rephasing """
+        self.rng.seed(seed)
+        for var in self.vars:
+            self.polarity[var] = self.rng.getrandbits(1)
+            self.activity.activity[var] = self.rng.random() * 1e-3  # well below one bump
+        self.activity.rebuild()
+
     def vsids(self) -> int:
-        picked_lit = None
-        while not picked_lit:
-            lit, _ = self.activity.pop()
-            if lit and abs(lit) not in self.assignments or self.value(lit) == 0:
-                picked_lit = lit
-        return picked_lit
+        # assigned vars are dropped lazily here and re-inserted exactly once on backtrack
+        while True:
+            var = self.activity.pop()
+            if self.lit_value[var] == 0:
+                return var if self.polarity[var] else -var
 
     def branch_random_lit(self) -> int:
         for v in self.vars:
-            if v not in self.assignments:
+            if self.lit_value[v] == 0:
                 debug_print(f"Branching on {v}", self.dlevel)
                 return v
         assert False
 
-    def solve(self) -> tuple[bool, dict[int, bool]]:
+    def solve(self, assumptions: Sequence[int] = ()) -> tuple[bool, dict[int, bool]]:
+        """ Looks for a model in which every assumption is True. If there is none, self.core is a subset of the
+        assumptions that can't all be True (empty if the clauses alone are UNSAT).
+
+        Can be called again, also after add_clause: learnt clauses, activities and saved phases carry over. Any var
+        can be assumed: one that elimination, substitution or PLE removed is brought back first (see reactivate),
+        so these stay on for incremental use. Adding vars to frozen before the first call avoids that work. """
         print("============ SOLVING ============")
+        self.solves += 1
+        self.backtrackUntil(0)
+        self.assumptions = list(assumptions)
+        self.core = []
+        self.solve_start = time.time()
+        self.inprocess_time = 0.0
+        if not self.ok:
+            return False, {}
+        for lit in self.assumptions:
+            if abs(lit) in self.elim_clauses or abs(lit) in self.equivalent:
+                self.reactivate(abs(lit))
+            if abs(lit) not in self.vars:
+                self.add_variable(lit)
+        if not self.ok:
+            return False, {}
+        if self.solves == 1:
+            frozen = self.frozen | {abs(l) for l in self.assumptions}
+            if self.propagate() != CREF_UNDEF or \
+                    (self.use_probing and not self.probe(frozen)) or self.propagate() != CREF_UNDEF or \
+                    (self.use_elim and len(self.clauses) + len(self.binary_clauses) <= ELIM_MAX_CLAUSES
+                     and not self.eliminate(frozen)):
+                self.ok = False
+                return False, {}
+        decide = getattr(self, self.heuristic)
         while True:
             confl_cl = self.propagate()
-            if confl_cl:
+            if confl_cl != CREF_UNDEF:
                 if self.dlevel == 0:
+                    self.ok = False
                     return False, {}
+                self.conflicts += 1
                 bt_level, learnt_lits, prop_lit = self.analyze(confl_cl)
+                lbd = self.compute_lbd(learnt_lits)
+                self.restart_policy.on_conflict(lbd)
                 
                 if len(learnt_lits) == 1:
                     assert bt_level == 0
                 
                 self.backtrackUntil(bt_level)
-                new_clause = self.add_clause(clause=learnt_lits, learnt=True)
-                if len(learnt_lits) > 1:
-                    # Propagate the first UIP
-                    # FIXME?: Should we assign one of the watched pointers in the new clause to the propagating literal?
-                    
-                    # TODO: Decay activity for var and clauses
-                    assert new_clause
+                new_clause = self.add_clause(clause=learnt_lits, learnt=True, lbd=lbd)
+                if new_clause != CREF_UNDEF and self.inprocess_fraction:
+                    self.new_learnts.append(new_clause)
+                if self.sharing is not None:
+                    self.sharing.export(learnt_lits, lbd)
+                if len(learnt_lits) == 2:
+                    # Propagate the first UIP; a binary reason is the other literal
+                    self.enqueue(prop_lit, binary_reason(learnt_lits[1]))
+                elif len(learnt_lits) > 2:
+                    # Propagate the first UIP (add_clause made it one of the watched literals)
+                    assert new_clause != CREF_UNDEF
                     self.enqueue(prop_lit, new_clause)
-                    
-                # len(learnt_lits) == 1 => bt_level = 0; add_clause skips adding the clause and propagates directly
+
+                # len(learnt_lits) == 1 => bt_level = 0; add_clause enqueues the literal directly
 
                 self.activity.decay_scores()
+                self.cla_inc *= 1 / self.cla_decay
                 
             else:
-                # TODO: Random restarts
-                # TODO: Reduce # learned clauses
+                if self.conflicts >= self.next_reduce:
+                    self.reduceDB()
+
+                if self.rephase_interval and self.conflicts >= self.next_rephase:
+                    self.rephase()
 
-                if self.is_expression_sat():
-                    return True, self.assignments
+                if self.restart_policy.should_restart():
+                    self.restart()
+                    if not self.ok:  # an imported clause was falsified at level 0
+                        return False, {}
+                    continue
+
+                if self.is_expression_sat() and self.dlevel >= len(self.assumptions):
+                    return True, self.model()
                 
-                if self.dlevel == 0 and not self.preprocess():
-                    return False, self.assignments
+                if self.dlevel == 0:
+                    if not self.preprocess():
+                        self.ok = False
+                        return False, {}
+                    if self.qhead < len(self.trail):  # propagate whatever preprocess assigned before deciding
+                        continue
 
-                branchLit = self.vsids()
-                # branchLit = self.branch_random_lit()
-                self.dlevel += 1
+                # assumption i is decided at level i + 1, before any real decision
+                branchLit = 0
+                while self.dlevel < len(self.assumptions):
+                    p = self.assumptions[self.dlevel]
+                    if self.value(p) == 1:
+                        self.new_decision_level()  # already True: an empty level keeps the numbering
+                    elif self.value(p) == -1:
+                        self.core = self.analyze_final(p)
+                        return False, {}
+                    else:
+                        branchLit = p
+                        break
+                if not branchLit:
+                    if self.is_expression_sat():
+                        return True, self.model()
+                    branchLit = decide()
+                self.new_decision_level()
                 self.enqueue(branchLit)
     
     def is_expression_sat(self) -> bool:
-        return len(self.assignments) == len(self.vars)
+        return len(self.trail) == len(self.vars)
 
-    def is_clause_sat(self, clause: Clause) -> bool:
-        return any(self.value(l) == 1 for l in clause.lits)
+    def is_clause_sat(self, lits: Sequence[int]) -> bool:
+        return any(self.value(l) == 1 for l in lits)
 
     def value(self, literal: int) -> int:
-        var = abs(literal)
-        if var not in self.assignments:
-            return 0
-        value = self.assignments[abs(literal)]
-        if value:
-            return 1 if literal > 0 else -1
-        return -1 if literal > 0 else 1
+        return self.lit_value[literal]
+
+    def model(self) -> dict[int, bool]:
+        model = {abs(lit): lit > 0 for lit in self.trail}
+        if self.elim_clauses:
+            extend_model(model, self.elim_clauses)
+        # substitution ran before elimination, so representatives may only get their value from extend_model
+        for var, rep in self.equivalent.items():
+            model[var] = model[abs(rep)] == (rep > 0)
+        return model
     
     def check(self) -> bool:
-        for clause in self.clauses:
-            if not any(self.value(l) == 1 for l in clause.lits):
+        for cref in self.clauses + self.learned_clauses:
+            if not self.is_clause_sat(self.arena.lits(cref)):
+                return False
+        for a, b in self.binary_clauses:
+            if self.value(a) != 1 and self.value(b) != 1:
                 return False
         return True
 
@@ -361,8 +1203,8 @@ class CDCLSolver:
         result.append(f"Number of clauses: {self.num_clauses}")
         result.append(f"Variables: {self.vars}")
         if self.clauses:
-            for i, c in enumerate(self.clauses):
-                result.append(f"Clause {i + 1}: {c.lits}")
+            for i, cref in enumerate(self.clauses):
+                result.append(f"Clause {i + 1}: {self.arena.lits(cref).tolist()}")
         else:
             result.append("No clauses!")
         return "\n".join(result)
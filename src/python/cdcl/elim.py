@@ -0,0 +1,254 @@
+""" SatELite-style preprocessing for CDCLSolver (Een & Biere, "Effective Preprocessing in SAT through Variable and
+Clause Elimination"): backward subsumption, self-subsuming strengthening and bounded variable elimination (BVE)
+over occurrence lists, run once before the search.
+
+The Simplifier works on its own copy of the irredundant clauses, as sets; the solver then rebuilds its clause DB
+from what is left (CDCLSolver.eliminate). Every clause removed along with an eliminated variable is kept in
+`eliminated`, so extend_model can give the variable a value that satisfies them once the rest of the model is known.
+"""
+from typing import Dict, List, Optional, Set
+from .arena import HEADER
+
+ELIM_CLAUSE_LIM = 20        # don't eliminate a variable if that would produce a resolvent longer than this
+ELIM_GROW = 0               # ... or more resolvents than the clauses it removes plus this
+SUBSUME_OCC_LIM = 1000      # don't look for subsumed clauses in occurrence lists longer than this
+STEPS_PER_LIT = 10          # work budget (subsumption checks + resolution steps) per literal in the formula
+MIN_STEPS = 1000000
+MAX_CLAUSES = 200000        # skip formulas bigger than this: just copying them into the simplifier costs seconds
+
+
+def clause_signature(clause) -> int:
+    """ Bloom filter over the variables: sig(c) & ~sig(d) != 0 rules out c subsuming or strengthening d """
+    sig = 0
+    for l in clause:
+        sig |= 1 << (abs(l) & 63)
+    return sig
+
+
+def subsumes(c: Set[int], d: Set[int]) -> Optional[int]:
+    """ None if c doesn't subsume d, 0 if it does, or l if c minus l subsumes d minus -l (d can lose -l) """
+    flipped = 0
+    for l in c:
+        if l in d:
+            continue
+        if not flipped and -l in d:
+            flipped = l
+            continue
+        return None
+    return flipped
+
+
+def extend_model(model: Dict[int, bool], eliminated: Dict[int, List[List[int]]]):
+    """ Gives values to the eliminated variables, last eliminated first. x can be True if every clause with -x
+    is satisfied without it; otherwise it is False, and then every clause with x is satisfied without x (their
+    resolvents with the unsatisfied -x clause are all satisfied). """
+    for var in reversed(list(eliminated)):
+        model[var] = True
+        for clause in eliminated[var]:
+            if -var in clause and not any(l != -var and model.get(abs(l)) == (l > 0) for l in clause):
+                model[var] = False
+                break
+
+
+class Simplifier:
+    def __init__(self, solver, frozen: Set[int]):
+        self.solver = solver
+        self.frozen = frozen                            # vars that must stay (e.g. assumptions)
+        self.clauses: List[Optional[Set[int]]] = []     # None once removed
+        self.signatures: List[int] = []
+        size = 2 * solver.num_vars + 1
+        self.occurs: List[Set[int]] = [set() for _ in range(size)]  # literal --> clause indices, indexed like lit_value
+        self.queue: List[int] = []                      # clauses to run backward subsumption with
+        self.units: List[int] = []                      # level-0 facts still to apply to the clauses
+        self.touched: Set[int] = set()                  # vars whose occurrences changed since the last round of BVE
+        self.eliminated: Dict[int, List[List[int]]] = {}
+        self.ok = True
+        self.steps = 0
+        self.subsumed = 0
+        self.strengthened = 0
+        self.added = 0                                  # resolvents
+
+    def load(self):
+        """ Copies the original clauses, minus those satisfied at level 0 and minus False literals """
+        solver = self.solver
+        lit_value = solver.lit_value
+        data = solver.arena.data
+        originals = [data[cref + HEADER:cref + HEADER + data[cref]] for cref in solver.clauses]
+        originals += solver.binary_clauses
+        # add() inlined: this runs once per clause of the formula
+        clauses, signatures, occurs = self.clauses, self.signatures, self.occurs
+        assigned = len(solver.trail) > 0
+        for lits in originals:
+            if assigned:
+                if any(lit_value[l] == 1 for l in lits):
+                    continue
+                lits = [l for l in lits if lit_value[l] == 0]
+                if len(lits) < 2:
+                    self.add(lits)
+                    if not self.ok:
+                        return
+                    continue
+            idx = len(clauses)
+            c = set(lits)
+            sig = 0
+            for l in c:
+                occurs[l].add(idx)
+                sig |= 1 << (abs(l) & 63)
+            clauses.append(c)
+            signatures.append(sig)
+        self.queue = list(range(len(clauses)))
+        self.steps = max(MIN_STEPS, STEPS_PER_LIT * sum(len(c) for c in clauses))
+
+    def add(self, clause: List[int]) -> int:
+        if len(clause) == 0:
+            self.ok = False
+            return -1
+        idx = len(self.clauses)
+        c = set(clause)
+        self.clauses.append(c)
+        self.signatures.append(clause_signature(c))
+        for l in c:
+            self.occurs[l].add(idx)
+            self.touched.add(abs(l))
+        self.queue.append(idx)
+        if len(c) == 1:
+            self.units.append(clause[0])
+        return idx
+
+    def remove(self, idx: int):
+        for l in self.clauses[idx]:
+            self.occurs[l].discard(idx)
+            self.touched.add(abs(l))
+        self.clauses[idx] = None
+
+    def strengthen(self, idx: int, lit: int):
+        """ Drops lit from clause idx """
+        c = self.clauses[idx]
+        c.discard(lit)
+        self.occurs[lit].discard(idx)
+        self.touched.add(abs(lit))
+        self.signatures[idx] = clause_signature(c)
+        self.strengthened += 1
+        if len(c) == 0:
+            self.ok = False
+        elif len(c) == 1:
+            self.units.append(next(iter(c)))
+        self.queue.append(idx)  # it may subsume more clauses now
+
+    def propagate_units(self) -> bool:
+        """ Assigns the pending units at level 0 and applies them to the clauses; False on a conflict """
+        solver = self.solver
+        while self.units and self.ok:
+            lit = self.units.pop()
+            if solver.value(lit) == 1:
+                continue
+            if solver.value(lit) == -1:
+                self.ok = False
+                break
+            solver.enqueue(lit)
+            for idx in list(self.occurs[lit]):
+                self.remove(idx)
+            for idx in list(self.occurs[-lit]):
+                self.strengthen(idx, -lit)
+        return self.ok
+
+    def backward_subsumption(self) -> bool:
+        clauses, occurs, signatures = self.clauses, self.occurs, self.signatures
+        while self.queue and self.steps > 0:
+            if not self.propagate_units():
+                return False
+            idx = self.queue.pop()
+            c = clauses[idx]
+            if c is None:
+                continue
+            # every clause c subsumes or strengthens contains best or -best
+            best, best_count = 0, SUBSUME_OCC_LIM + 1
+            for l in c:
+                count = len(occurs[l]) + len(occurs[-l])
+                if count < best_count:
+                    best, best_count = l, count
+            if not best:
+                continue
+            sig = signatures[idx]
+            self.steps -= best_count
+            for other in list(occurs[best]) + list(occurs[-best]):
+                d = clauses[other]
+                if other == idx or d is None or len(d) < len(c) or sig & ~signatures[other]:
+                    continue
+                self.steps -= 1
+                flipped = subsumes(c, d)
+                if flipped is None:
+                    continue
+                if flipped == 0:
+                    self.remove(other)
+                    self.subsumed += 1
+                else:
+                    self.strengthen(other, -flipped)
+                    if not self.ok:
+                        return False
+        return self.propagate_units()
+
+    def resolvents(self, var: int) -> Optional[List[List[int]]]:
+        """ The non-tautological resolvents on var, or None if eliminating var isn't worth it """
+        pos = [self.clauses[i] for i in self.occurs[var]]
+        neg = [self.clauses[i] for i in self.occurs[-var]]
+        limit = len(pos) + len(neg) + ELIM_GROW
+        out = []
+        for p in pos:
+            for n in neg:
+                self.steps -= 1
+                resolvent = set(p)
+                resolvent.discard(var)
+                for l in n:
+                    if l == -var:
+                        continue
+                    if -l in resolvent:
+                        break
+                    resolvent.add(l)
+                else:
+                    if len(resolvent) > ELIM_CLAUSE_LIM or len(out) == limit:
+                        return None
+                    out.append(list(resolvent))
+        return out
+
+    def eliminate_var(self, var: int) -> bool:
+        resolvents = self.resolvents(var)
+        if resolvents is None:
+            return False
+        removed = []
+        for idx in list(self.occurs[var]) + list(self.occurs[-var]):
+            removed.append(list(self.clauses[idx]))
+            self.remove(idx)
+        self.eliminated[var] = removed
+        for resolvent in resolvents:
+            self.add(resolvent)
+            if not self.ok:
+                break
+        self.added += len(resolvents)
+        return True
+
+    def run(self) -> bool:
+        """ Returns False if the clauses turned out to be UNSAT """
+        solver = self.solver
+        self.load()
+        if not self.ok or not self.backward_subsumption():
+            return False
+        # the first round tries every var, later ones those whose clauses changed in the round before
+        candidates = solver.vars
+        while candidates and self.steps > 0:
+            self.touched = set()
+            # cheapest first: few occurrences on one side means few resolvents
+            candidates = [v for v in candidates if v not in self.frozen and v not in self.eliminated]
+            candidates.sort(key=lambda v: len(self.occurs[v]) * len(self.occurs[-v]))
+            for var in candidates:
+                if self.steps <= 0:
+                    break
+                if solver.value(var) != 0:
+                    continue
+                if self.eliminate_var(var) and not self.backward_subsumption():
+                    return False
+            candidates = self.touched
+        return self.ok
+
+    def remaining(self) -> List[List[int]]:
+        return [list(c) for c in self.clauses if c is not None]
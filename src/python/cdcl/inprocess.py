@@ -0,0 +1,128 @@
+""" Inprocessing for CDCLSolver: simplifications of the clause DB that run at restarts during the search, unlike the
+one-shot elim.py / probe.py. CDCLSolver.inprocess runs them at level 0, every INPROCESS_INTERVAL conflicts at most.
+A round gets whatever is left of inprocess_fraction of the solve time as a deadline, and vivify / subsume stop
+when it passes:
+
+- vivification: the negations of the literals of a clause are assigned one at a time and propagated. A literal that
+  turns False can go, and once one turns True or propagation runs into a conflict, the rest of the clause can go too.
+  Learnt clauses from the last interval (tier2 and better) go first, then irredundant clauses round-robin, within a
+  budget of propagation ticks (literals propagated + watchers visited) relative to those of the search since the last
+  round.
+- subsumption by the learnt clauses of the last interval. A learnt clause that subsumes an irredundant one takes
+  its place as an irredundant clause.
+- removal of clauses satisfied at level 0 (CDCLSolver.remove_satisfied).
+"""
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from .arena import CREF_UNDEF, HEADER, DELETED, LEARNT
+
+INPROCESS_INTERVAL = 2000   # conflicts between two rounds, at least
+VIVIFY_EFFORT = 0.1         # vivification budget: ticks per tick of the search since the last round
+VIVIFY_MIN_STEPS = 10000
+VIVIFY_LEARNTS_SHARE = 0.4  # of the round's time: the new learnt clauses are vivified until this share is used,
+VIVIFY_SHARE = 0.8          # the irredundant ones until this one is, and subsumption gets the rest
+SUBSUME_OCC_LIM = 1000      # don't look for subsumed clauses in occurrence lists longer than this
+
+
+def vivify_clause(solver, lits) -> Optional[List[int]]:
+    """ The literals of lits that are needed given the other clauses (lits itself if none can go), or None if the
+    clause is satisfied at level 0 """
+    value = solver.value
+    if any(value(l) == 1 for l in lits):
+        return None
+    needed = []
+    solver.new_decision_level()
+    for l in lits:
+        val = value(l)
+        if val == -1:
+            continue
+        needed.append(l)
+        if val == 1:
+            break
+        solver.enqueue(-l)
+        if solver.propagate() != CREF_UNDEF:
+            break
+    solver.backtrackUntil(0)
+    return needed
+
+
+def vivify(solver, crefs: List[int], steps: int, removed: Set[int], deadline: float) -> Tuple[int, int]:
+    """ Vivifies the clauses in crefs until the steps (propagation ticks) run out or time.time() passes deadline. A
+    shortened clause is added anew, and the old one goes into removed along with the satisfied ones. Returns
+    (clauses visited, steps left); stops early with solver.ok = False if the clauses turn out to be UNSAT. """
+    data = solver.arena.data
+    visited = 0
+    for cref in crefs:
+        if steps <= 0 or time.time() > deadline:
+            break
+        visited += 1
+        if data[cref + 1] & DELETED or cref in removed:
+            continue
+        # units found for earlier clauses have to be propagated before the next one
+        if solver.propagate() != CREF_UNDEF:
+            solver.ok = False
+            break
+        lits = data[cref + HEADER:cref + HEADER + data[cref]]
+        ticks = solver.ticks
+        needed = vivify_clause(solver, lits)
+        steps -= 1 + solver.ticks - ticks
+        if needed is None:
+            removed.add(cref)
+            continue
+        if len(needed) == len(lits):
+            continue
+        solver.store_clause(needed, learnt=bool(data[cref + 1] & LEARNT), lbd=min(data[cref + 2], len(needed)))
+        removed.add(cref)
+        solver.count_stat("vivified", 1)
+        solver.count_stat("vivify_removed_lits", len(lits) - len(needed))
+        if not solver.ok:
+            break
+    return visited, steps
+
+
+def subsume(solver, learnts: List[int], removed: Set[int], deadline: float) -> List[int]:
+    """ Puts the clauses subsumed by one of learnts into removed, until time.time() passes deadline. Returns the
+    learnt clauses that subsumed an irredundant one: their LEARNT flag is cleared here, moving them to
+    solver.clauses is left to the caller. """
+    data = solver.arena.data
+    learnts = [cref for cref in learnts if not data[cref + 1] & DELETED and cref not in removed]
+    if not learnts:
+        return []
+    # occurrence lists, only for the literals and clauses that can matter
+    occurs: Dict[int, List[int]] = {}
+    for cref in learnts:
+        for l in data[cref + HEADER:cref + HEADER + data[cref]]:
+            occurs[l] = []
+    min_size = min(data[cref] for cref in learnts)
+    for i, cref in enumerate(solver.clauses + solver.learned_clauses):
+        if not i & 1023 and time.time() > deadline:
+            return []
+        if data[cref] < min_size:  # too short to be subsumed by any of learnts
+            continue
+        for l in data[cref + HEADER:cref + HEADER + data[cref]]:
+            occ = occurs.get(l)
+            if occ is not None:
+                occ.append(cref)
+
+    promoted = []
+    learnts.sort(key=data.__getitem__)  # shortest first: they subsume the most
+    for cref in learnts:
+        if time.time() > deadline:
+            break
+        if cref in removed:
+            continue
+        c = set(data[cref + HEADER:cref + HEADER + data[cref]])
+        best = min(c, key=lambda l: len(occurs[l]))
+        if len(occurs[best]) > SUBSUME_OCC_LIM:
+            continue
+        for other in occurs[best]:
+            if other == cref or other in removed or data[other] < len(c):
+                continue
+            if not c.issubset(data[other + HEADER:other + HEADER + data[other]]):
+                continue
+            removed.add(other)
+            solver.count_stat("inprocess_subsumed", 1)
+            if not data[other + 1] & LEARNT and data[cref + 1] & LEARNT:
+                data[cref + 1] = 0  # irredundant now (no LEARNT flag, no tier)
+                promoted.append(cref)
+    return [cref for cref in promoted if cref not in removed]
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+""" Parallel CDCL: N CDCLSolver processes on the same instance, each with its own seed and restart policy,
+exchanging units and glue clauses through shared-memory rings (see sharing.py). The first answer wins.
+
+Usage: python -m src.python.cdcl.parallel <cnf file> [--jobs N] [--time-limit T]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import List
+from ..csr import load_dimacs, load_csr
+from .cdcl import CDCLSolver
+from .restarts import LubyRestarts, GlucoseRestarts
+from .sharing import ClauseRing, ClauseSharing
+
+
+def worker_main(conn, file_name: str, ring_names: List[str], index: int):
+    sys.stdout = open(os.devnull, 'w')  # solve() prints progress
+    instance = load_dimacs(file_name, CDCLSolver)
+    instance.restart_policy = LubyRestarts() if index % 2 == 0 else GlucoseRestarts()
+    if index:
+        instance.set_seed(index)
+    instance.sharing = ClauseSharing(ring_names, index)
+    sat, assignments = instance.solve()
+    conn.send((sat, assignments, instance.sharing.exported, instance.sharing.imported))
+    instance.sharing.close()
+
+
+def solve_parallel(file_name: str, jobs: int, time_limit=None):
+    """ Returns (sat, assignments, winning worker) or None on timeout """
+    rings = [ClauseRing() for _ in range(jobs)]
+    names = [ring.name for ring in rings]
+    workers = []
+    for i in range(jobs):
+        conn, child_conn = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=worker_main, args=(child_conn, file_name, names, i), daemon=True)
+        process.start()
+        child_conn.close()
+        workers.append((conn, process))
+
+    deadline = time.time() + time_limit if time_limit else None
+    result = None
+    try:
+        running = {conn: i for i, (conn, _) in enumerate(workers)}
+        while running and result is None:
+            ready = wait(list(running), timeout=max(0.0, deadline - time.time()) if deadline else None)
+            if not ready:
+                break
+            for conn in ready:
+                i = running.pop(conn)
+                try:
+                    sat, assignments, exported, imported = conn.recv()
+                except EOFError:  # the worker crashed
+                    continue
+                print(f"worker {i} answered first (exported {exported}, imported {imported} clauses)")
+                result = (sat, assignments, i)
+                break
+    finally:
+        for conn, process in workers:
+            if process.is_alive():
+                process.kill()
+            process.join()
+            conn.close()
+        for ring in rings:
+            ring.close()
+            ring.unlink()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel CDCL with learnt clause sharing")
+    parser.add_argument("input_file")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds")
+    args = parser.parse_args()
+    filename = Path(args.input_file).name
+
+    start = time.time()
+    result = solve_parallel(args.input_file, max(1, args.jobs), args.time_limit)
+    elapsed = time.time() - start
+    if result is None:
+        print(json.dumps({"Instance": filename, "Time": "--", "Result": "--"}))
+        sys.exit(1)
+
+    sat, assignments, _ = result
+    print("Result:", "SAT" if sat else "UNSAT")
+    if sat and not load_csr(args.input_file).is_satisfied_by(assignments):
+        print("Incorrect assignment")
+    res = {"Instance": filename, "Time": f"{elapsed:.2f}", "Result": "SAT" if sat else "UNSAT"}
+    if sat:
+        res["Solution"] = " ".join(f"{v} {a}" for v, a in assignments.items())
+    print(json.dumps(res))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+""" Level-0 simplifications on the binary implication graph for CDCLSolver, run once before the search:
+
+- failed-literal probing: a candidate literal is assigned at level 1 and propagated with the solver's own
+  propagate(). If that runs into a conflict, its negation holds at level 0. Literals implied by both polarities of a
+  variable hold at level 0 too (necessary assignments).
+- equivalent-literal substitution: the literals in a strongly connected component of the binary implication graph
+  imply each other, so every variable of the component is replaced by one representative literal
+  (CDCLSolver.equivalent) and the model gives it the representative's value.
+"""
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+from .arena import CREF_UNDEF, HEADER
+
+PROBE_STEPS_PER_CLAUSE = 5    # budget: literals implied over all probes, per clause
+PROBE_MIN_STEPS = 10000
+
+
+def probe_literal(solver, lit: int) -> Optional[List[int]]:
+    """ The literals lit implies, or None if assigning it runs into a conflict """
+    solver.new_decision_level()
+    solver.enqueue(lit)
+    implied = None if solver.propagate() != CREF_UNDEF else solver.trail[solver.trail_lim[0] + 1:]
+    solver.backtrackUntil(0)
+    return implied
+
+
+def assign_unit(solver, lit: int) -> bool:
+    """ Assigns lit at level 0 and propagates it; False on a conflict """
+    if solver.value(lit) != 0:
+        return solver.value(lit) == 1
+    solver.enqueue(lit)
+    return solver.propagate() == CREF_UNDEF
+
+
+def probe_failed_literals(solver, steps: int) -> Tuple[bool, int, int]:
+    """ Returns (False if UNSAT, failed literals, necessary assignments). Only variables with binary implications
+    are probed: propagating anything else goes through long clauses only and rarely leads anywhere. """
+    implied = solver.literal2implied
+    candidates = [v for v in solver.vars if solver.value(v) == 0 and (implied[v] or implied[-v])]
+    candidates.sort(key=lambda v: len(implied[v]) + len(implied[-v]), reverse=True)
+
+    # backtracking saves phases, and these assignments shouldn't steer the search
+    polarity = array('b', solver.polarity)
+    best_phase, best_trail_size = array('b', solver.best_phase), solver.best_trail_size
+    failed = necessary = 0
+    ok = True
+    for var in candidates:
+        if steps <= 0:
+            break
+        if solver.value(var) != 0:
+            continue
+        pos = probe_literal(solver, var)
+        if pos is None:
+            failed += 1
+            ok = assign_unit(solver, -var)
+        else:
+            neg = probe_literal(solver, -var)
+            if neg is None:
+                failed += 1
+                ok = assign_unit(solver, var)
+            else:
+                steps -= 2 + len(pos) + len(neg)
+                for lit in set(pos).intersection(neg):
+                    if solver.value(lit) == 0:
+                        necessary += 1
+                        ok = assign_unit(solver, lit)
+                        if not ok:
+                            break
+        if not ok:
+            break
+    solver.polarity = polarity
+    solver.best_phase, solver.best_trail_size = best_phase, best_trail_size
+    return ok, failed, necessary
+
+
+def equivalent_literals(solver, frozen: Set[int]) -> Optional[Dict[int, int]]:
+    """ var --> literal it is equivalent to, from the SCCs of the binary implication graph (Tarjan's algorithm,
+    iterative so deep graphs don't hit the recursion limit). None if some x is equivalent to -x, i.e. UNSAT.
+    The representative of a component is its smallest frozen var if it has one, else its smallest var; other
+    frozen vars are left alone. """
+    implied = solver.literal2implied
+    value = solver.value
+    index: Dict[int, int] = {}
+    low: Dict[int, int] = {}
+    stack: List[int] = []
+    on_stack: Set[int] = set()
+    equivalent: Dict[int, int] = {}
+
+    roots = [lit for v in solver.vars if value(v) == 0 for lit in (v, -v) if implied[lit]]
+    for root in roots:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(implied[root]))]
+        while work:
+            lit, edges = work[-1]
+            for nxt in edges:
+                if value(nxt) != 0:
+                    continue
+                if nxt not in index:
+                    index[nxt] = low[nxt] = len(index)
+                    stack.append(nxt)
+                    on_stack.add(nxt)
+                    work.append((nxt, iter(implied[nxt])))
+                    break
+                if nxt in on_stack and index[nxt] < low[lit]:
+                    low[lit] = index[nxt]
+            else:
+                work.pop()
+                if work and low[lit] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[lit]
+                if low[lit] != index[lit]:
+                    continue
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == lit:
+                        break
+                if len(component) == 1:
+                    continue
+                if len({abs(m) for m in component}) < len(component):
+                    return None
+                # the mirror component (all negated) picks the negated representative
+                rep = min(component, key=lambda m: (abs(m) not in frozen, abs(m)))
+                for member in component:
+                    if member != rep and abs(member) not in frozen and abs(member) not in equivalent:
+                        equivalent[abs(member)] = rep if member > 0 else -rep
+    return equivalent
+
+
+def substitute(solver, equivalent: Dict[int, int]) -> List[List[int]]:
+    """ The original clauses with every var of equivalent replaced, without satisfied clauses, false literals,
+    duplicate literals and tautologies """
+    lit_value = solver.lit_value
+    data = solver.arena.data
+    originals = [data[cref + HEADER:cref + HEADER + data[cref]] for cref in solver.clauses]
+    originals += solver.binary_clauses
+    clauses = []
+    for lits in originals:
+        clause = set()
+        for l in lits:
+            rep = equivalent.get(abs(l))
+            if rep is not None:
+                l = rep if l > 0 else -rep
+            if lit_value[l] == 1 or -l in clause:
+                break
+            if lit_value[l] == 0:
+                clause.add(l)
+        else:
+            clauses.append(list(clause))
+    return clauses
@@ -0,0 +1,95 @@
+""" Restart policies for CDCLSolver.
+
+The solver calls on_conflict() with the LBD of every learnt clause, asks should_restart() before each decision,
+and calls on_restart() after backtracking to level 0. Learnt clauses and VSIDS activity survive restarts.
+"""
+
+
+class RestartPolicy:
+    name = "none"
+
+    def __init__(self):
+        self.conflicts = 0  # conflicts since the last restart
+
+    def on_conflict(self, lbd: int):
+        self.conflicts += 1
+
+    def should_restart(self) -> bool:
+        return False
+
+    def on_restart(self):
+        self.conflicts = 0
+
+
+def luby(y: float, x: int) -> float:
+    """ x-th element (0-indexed) of the Luby sequence scaled by y: 1 1 2 1 1 2 4 1 1 2 ... for y = 2 (from MiniSat) """
+    size, seq = 1, 0
+    while size < x + 1:
+        seq += 1
+        size = 2 * size + 1
+    while size - 1 != x:
+        size = (size - 1) >> 1
+        seq -= 1
+        x = x % size
+    return y ** seq
+
+
+class LubyRestarts(RestartPolicy):
+    name = "luby"
+
+    def __init__(self, unit: int = 100, base: float = 2):
+        super().__init__()
+        self.unit = unit
+        self.base = base
+        self.restarts = 0
+        self.limit = luby(base, 0) * unit
+
+    def should_restart(self) -> bool:
+        return self.conflicts >= self.limit
+
+    def on_restart(self):
+        super().on_restart()
+        self.restarts += 1
+        self.limit = luby(self.base, self.restarts) * self.unit
+
+
+class EMA:
+    """ Exponential moving average, bias-corrected so early values aren't dragged towards 0 """
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.biased = 0.0
+        self.decay = 1.0
+        self.value = 0.0
+
+    def update(self, x: float):
+        self.biased += self.alpha * (x - self.biased)
+        self.decay *= 1 - self.alpha
+        self.value = self.biased / (1 - self.decay)
+
+
+class GlucoseRestarts(RestartPolicy):
+    """ Restart when the recent LBDs are clearly worse than the long-run average (exponential moving averages). """
+    name = "glucose"
+
+    def __init__(self, fast_alpha: float = 1 / 32, slow_alpha: float = 1 / 4096, margin: float = 1.1,
+                 min_conflicts: int = 50):
+        super().__init__()
+        self.margin = margin
+        self.min_conflicts = min_conflicts
+        self.fast_ema = EMA(fast_alpha)
+        self.slow_ema = EMA(slow_alpha)
+
+    def on_conflict(self, lbd: int):
+        super().on_conflict(lbd)
+        self.fast_ema.update(lbd)
+        self.slow_ema.update(lbd)
+
+    def should_restart(self) -> bool:
+        return self.conflicts >= self.min_conflicts and self.fast_ema.value > self.margin * self.slow_ema.value
+
+
+RESTART_POLICIES = {
+    RestartPolicy.name: RestartPolicy,
+    LubyRestarts.name: LubyRestarts,
+    GlucoseRestarts.name: GlucoseRestarts,
+}
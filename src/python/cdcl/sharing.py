@@ -0,0 +1,100 @@
+""" Learnt-clause sharing between CDCLSolver processes over shared memory.
+
+Every worker owns one ring buffer in a SharedMemory block and is the only process that writes to it, so no locks
+are needed: the writer appends [size, lits...] entries (wrapping around) and then publishes them by advancing
+`head`, the total number of words ever written. Each reader keeps its own cursor into every other worker's ring.
+A reader that fell more than a ring behind skips ahead, and one that was lapped while copying an entry stops
+before it and retries from there on its next read (the seqlock check in read_from).
+
+    ring block: [head: int64] [capacity int32 words]
+"""
+from multiprocessing import shared_memory
+from typing import List, Optional
+
+HEAD_BYTES = 8
+RING_WORDS = 1 << 20
+
+# what gets exported: units and short clauses with a low LBD ("glue" clauses)
+SHARE_MAX_SIZE = 30
+SHARE_MAX_LBD = 3
+
+
+class ClauseRing:
+    def __init__(self, name: Optional[str] = None, capacity: int = RING_WORDS):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=HEAD_BYTES + 4 * capacity)
+            self.shm.buf[:HEAD_BYTES] = bytes(HEAD_BYTES)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.head = self.shm.buf[:HEAD_BYTES].cast('q')
+        self.words = self.shm.buf[HEAD_BYTES:].cast('i')
+        self.capacity = len(self.words)
+
+    def write(self, lits: List[int]):
+        """ Only ever called by the ring's owner """
+        words, capacity = self.words, self.capacity
+        pos = self.head[0]
+        words[pos % capacity] = len(lits)
+        for i, lit in enumerate(lits, 1):
+            words[(pos + i) % capacity] = lit
+        self.head[0] = pos + 1 + len(lits)  # publish after the entry is written
+
+    def read_from(self, cursor: int) -> tuple[int, List[List[int]]]:
+        """ The new cursor, and the entries published since cursor. An entry that may have been overwritten while it
+        was copied ends the read: the new cursor points at it, so the next read retries it (or skips ahead, if by
+        then it is a whole ring behind). """
+        words, capacity = self.words, self.capacity
+        head = self.head[0]
+        if head - cursor > capacity:  # lapped: whatever was at cursor has been overwritten
+            cursor = head
+        clauses = []
+        pos = cursor
+        while pos < head:
+            size = words[pos % capacity]
+            if size <= 0 or pos + 1 + size > head:  # torn by the writer lapping us
+                break
+            clause = [words[(pos + 1 + i) % capacity] for i in range(size)]
+            # the writer can be one unpublished entry past head: it must not have reached this entry's words again
+            if self.head[0] + 1 + SHARE_MAX_SIZE - capacity > pos:
+                break
+            pos += 1 + size
+            clauses.append(clause)
+        return pos, clauses
+
+    def close(self):
+        self.head.release()
+        self.words.release()
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+class ClauseSharing:
+    """ A worker's view: its own ring to export into, and a cursor into every other worker's ring """
+    def __init__(self, ring_names: List[str], index: int):
+        self.rings = [ClauseRing(name) for name in ring_names]
+        self.index = index
+        self.cursors = [0] * len(self.rings)
+        self.exported = 0
+        self.imported = 0
+
+    def export(self, lits: List[int], lbd: int):
+        if len(lits) <= SHARE_MAX_SIZE and (len(lits) == 1 or lbd <= SHARE_MAX_LBD):
+            self.rings[self.index].write(lits)
+            self.exported += 1
+
+    def collect(self) -> List[List[int]]:
+        clauses = []
+        for i, ring in enumerate(self.rings):
+            if i == self.index:
+                continue
+            self.cursors[i], new = ring.read_from(self.cursors[i])
+            clauses.extend(new)
+        self.imported += len(clauses)
+        return clauses
+
+    def close(self):
+        for ring in self.rings:
+            ring.close()
@@ -4,21 +4,62 @@ import json
 import sys
 from pathlib import Path
 from .parser import DimacsParser
+from ..csr import load_csr, cnf_fingerprint
+from ..result_cache import ResultCache
 from .utils import Clock
 from .cdcl import CDCLSolver
+from .restarts import RESTART_POLICIES
 from pprint import pprint
 import traceback
 
 
+def report(filename: str, time: float, sat: bool, assignments: dict):
+    res = {
+        "Instance": filename,
+        "Time": f"{time:.2f}",
+        "Result": "SAT" if sat else "UNSAT",
+    }
+    if sat:
+        assignment_list = []
+        for v, a in assignments.items():
+            assignment_list.append(str(v))
+            assignment_list.append(str(a))
+        res["Solution"] = " ".join(assignment_list)
+    print(json.dumps(res))
+
+
 def main():
     """Usage example: read a given cnf instance file to create a simple sat instance object and print out its parameter fields."""
 
-    if len(sys.argv) < 2:
-        f
+    args = [arg for arg in sys.argv[1:] if arg != "--no-cache"]
+    use_cache = len(args) == len(sys.argv) - 1
+    if len(args) < 1:
+        print(f"Usage: python -m src.python.cdcl.solve <cnf file> [{'|'.join(RESTART_POLICIES)}] [--no-cache]")
         return
 
-    input_file = sys.argv[1]
+    input_file = args[0]
+    restart_policy = args[1] if len(args) > 1 else "luby"
+    if restart_policy not in RESTART_POLICIES:
+        print(f"Unknown restart policy: {restart_policy}")
+        sys.exit(1)
     filename = Path(input_file).name
+    engine = f"cdcl restart={restart_policy}"
+
+    # a formula that was solved before (up to clause/literal order) is answered from the result cache
+    result_cache = None
+    if use_cache:
+        watch = Clock()
+        watch.start()
+        csr = load_csr(input_file)
+        fingerprint = cnf_fingerprint(csr)
+        result_cache = ResultCache()
+        cached = result_cache.get(fingerprint)
+        if cached is not None and (not cached.sat or csr.is_satisfied_by(cached.assignments)):
+            watch.stop()
+            print(f"Cached result from {cached.engine} (solved in {cached.solve_time:.2f}s)")
+            print("Result:", "SAT" if cached.sat else "UNSAT")
+            report(filename, watch.get_time(), cached.sat, cached.assignments)
+            return
 
     watch = Clock()
     watch.start()
@@ -37,31 +78,26 @@ def main():
 
     assert instance.num_vars > 0
     assert instance.num_clauses > 0
+    instance.restart_policy = RESTART_POLICIES[restart_policy]()
 
     watch = Clock()
     watch.start()
     sat, assignments = instance.solve() # type: ignore
     watch.stop()
 
-    res = {
-        "Instance": filename,
-        "Time": f"{watch.get_time():.2f}",
-        "Result": "SAT" if sat else "UNSAT",
-    }
-    if sat:
-        assignment_list = []
-        for v, a in assignments.items():
-            assignment_list.append(str(v))
-            assignment_list.append(str(a))
-        res["Solution"] = " ".join(assignment_list)
-        
     print("Result:", "SAT" if sat else "UNSAT")
-    if sat and not instance.check(): # type: ignore
+    # checked against the CNF itself: instance.check() only sees the clauses the solver still holds
+    if sat and not use_cache:
+        csr = load_csr(input_file)
+    correct = not sat or csr.is_satisfied_by(assignments)
+    if not correct:
         print("Incorrect assignment")
+    elif result_cache is not None:
+        result_cache.put(fingerprint, sat, assignments, watch.get_time(), engine)
 
     pprint(instance.function_stats)
     print("Total time spent in watched functions:", sum([x.time for x in instance.function_stats.values()]))
-    print(json.dumps(res))
+    report(filename, watch.get_time(), sat, assignments)
     
 
 
@@ -0,0 +1,285 @@
+""" Bulk CNF loading into CSR arrays.
+
+All the literals of the formula go into one int32 array and clause i is lits[offsets[i]:offsets[i + 1]], so no
+per-clause Python objects are created while reading. Duplicate literals and tautologies are removed for the
+whole formula at once, so engines can bulk-initialize through add_clauses_csr(lits, offsets) without the
+per-clause `-l in clause` checks of add_clause.
+
+NumPy is optional: without it the same arrays are built with array('i') in pure Python.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import warnings
+from array import array
+from typing import Callable, Any, Optional, Dict
+from .dimacs import DimacsReader, open_dimacs, parse_dimacs, CHUNK_SIZE
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class CSRClauses:
+    def __init__(self, num_vars: int, num_clauses: int, lits, offsets):
+        self.num_vars = num_vars            # max(header, largest variable that occurs)
+        self.num_clauses = num_clauses      # from the header
+        self.lits = lits                    # int32, clause after clause
+        self.offsets = offsets              # len(clauses) + 1 entries
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def clause(self, i: int):
+        return self.lits[self.offsets[i]:self.offsets[i + 1]]
+
+    def variables(self) -> list[int]:
+        """ Every variable that occurs, in increasing order """
+        if np is not None and isinstance(self.lits, np.ndarray):
+            occurs = np.zeros(self.num_vars + 1, dtype=bool)
+            occurs[np.abs(self.lits)] = True
+            return np.flatnonzero(occurs).tolist()
+        return sorted({abs(l) for l in self.lits})
+
+    def is_satisfied_by(self, assignments: Dict[int, bool]) -> bool:
+        """ True if every clause has a literal made True by assignments (var --> value) """
+        if np is not None and isinstance(self.lits, np.ndarray):
+            values = np.zeros(self.num_vars + 1, dtype=np.int8)
+            for var, value in assignments.items():
+                if var <= self.num_vars:
+                    values[var] = 1 if value else -1
+            true_lits = (values[np.abs(self.lits)] * np.sign(self.lits)) > 0
+            counts = np.zeros(len(true_lits) + 1, dtype=np.int64)
+            np.cumsum(true_lits, out=counts[1:])
+            offsets = np.asarray(self.offsets)
+            return bool((counts[offsets[1:]] > counts[offsets[:-1]]).all())
+        return all(any(assignments.get(abs(l)) == (l > 0) for l in self.clause(i)) for i in range(len(self)))
+
+
+# cnf_fingerprint: every literal goes through splitmix64 with two seeds; a clause hashes to the (mixed) sums of its
+# literals in both lanes, and the formula to the digest of its sorted, deduplicated clause hashes. This makes the
+# fingerprint independent of clause order, literal order, duplicates, tautologies and comments.
+MASK64 = (1 << 64) - 1
+FINGERPRINT_SEEDS = (0x9E3779B97F4A7C15, 0xD1B54A32D192ED03)
+
+
+def _mix64(z: int) -> int:
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+
+def _mix64_np(z):
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def cnf_fingerprint(csr: CSRClauses) -> str:
+    """ Canonical hash of the clause set (see above), as a hex string """
+    if np is not None and isinstance(csr.lits, np.ndarray):
+        lits = csr.lits.astype(np.int64).astype(np.uint64)  # two's complement, like `& MASK64` below
+        offsets = np.asarray(csr.offsets)
+        sizes = (offsets[1:] - offsets[:-1]).astype(np.uint64)
+        lanes = []
+        for seed in FINGERPRINT_SEEDS:
+            sums = np.zeros(len(lits) + 1, dtype=np.uint64)
+            np.cumsum(_mix64_np(lits ^ np.uint64(seed)), out=sums[1:])
+            lanes.append(_mix64_np(sums[offsets[1:]] - sums[offsets[:-1]] + sizes * np.uint64(seed)))
+        order = np.lexsort((lanes[1], lanes[0]))
+        hashes = np.stack([lanes[0][order], lanes[1][order]], axis=1)
+        if len(hashes):
+            hashes = hashes[np.concatenate(([True], (hashes[1:] != hashes[:-1]).any(axis=1)))]
+        data = hashes.astype('<u8').tobytes()
+    else:
+        hashes = set()
+        for i in range(len(csr)):
+            clause = csr.clause(i)
+            hashes.add(tuple(_mix64((sum(_mix64((l & MASK64) ^ seed) for l in clause) + len(clause) * seed) & MASK64)
+                             for seed in FINGERPRINT_SEEDS))
+        flat = array('Q', [h for pair in sorted(hashes) for h in pair])
+        if sys.byteorder != 'little':
+            flat.byteswap()
+        data = flat.tobytes()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def read_csr(file_name: str, chunk_size: int = CHUNK_SIZE) -> CSRClauses:
+    with open_dimacs(file_name) as file:
+        reader = DimacsReader(file, chunk_size)
+        if np is None:
+            return _read_csr_python(reader)
+
+        parts = []
+        with warnings.catch_warnings():
+            # fromstring only warns when it stops at a bad token
+            warnings.simplefilter("error", DeprecationWarning)
+            for body in reader.chunks():
+                if not body or body.isspace():  # fromstring would read a 0 out of nothing
+                    continue
+                try:
+                    parts.append(np.fromstring(body, dtype=np.int32, sep=' '))
+                except (ValueError, DeprecationWarning) as e:
+                    raise ValueError(f"Error: bad token in clause: {e}")
+    flat = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int32)
+    if len(flat) and flat[-1] != 0:  # last clause without its terminating 0
+        flat = np.append(flat, np.int32(0))
+    return _normalize(reader.num_vars, reader.num_clauses, flat)
+
+
+def _normalize(num_vars: int, num_clauses: int, flat) -> CSRClauses:
+    """ Splits the 0-terminated literal stream into clauses, dropping duplicate literals and tautologies """
+    is_end = flat == 0
+    n = int(is_end.sum())
+    # clause id of every literal: the number of terminators before it
+    clause_ids = (np.cumsum(is_end) - is_end)[~is_end].astype(np.int64)
+    lits = flat[~is_end].astype(np.int64)
+    if len(lits):
+        num_vars = max(num_vars, int(np.abs(lits).max()))
+
+    # sort by (clause, var, sign): duplicates and complementary pairs end up next to each other
+    keys = np.sort(clause_ids * (2 * num_vars + 2) + 2 * np.abs(lits) + (lits > 0))
+    if len(keys):
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    clause_ids = keys // (2 * num_vars + 2)
+    rem = keys % (2 * num_vars + 2)
+    lits = np.where(rem & 1, rem >> 1, -(rem >> 1))
+
+    # tautology: the same var twice in a clause (duplicates are gone, so with both signs)
+    same = (clause_ids[1:] == clause_ids[:-1]) & (np.abs(lits[1:]) == np.abs(lits[:-1]))
+    tautologies = np.zeros(n, dtype=bool)
+    tautologies[clause_ids[1:][same]] = True
+    keep = ~tautologies[clause_ids]
+    lits = lits[keep].astype(np.int32)
+    clause_ids = clause_ids[keep]
+
+    # empty clauses are kept (as empty rows), tautologies are dropped
+    counts = np.bincount(clause_ids, minlength=n)[~tautologies]
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return CSRClauses(num_vars, num_clauses, lits, offsets)
+
+
+def _read_csr_python(reader: DimacsReader) -> CSRClauses:
+    num_vars = reader.num_vars
+    lits = array('i')
+    offsets = array('q', [0])
+    clause: set[int] = set()
+    tautology = False
+    for body in reader.chunks():
+        for literal in map(int, body.split()):
+            if literal != 0:
+                if -literal in clause:
+                    tautology = True
+                clause.add(literal)
+                continue
+            if not tautology:
+                lits.extend(sorted(clause, key=abs))
+                offsets.append(len(lits))
+                num_vars = max(num_vars, max(map(abs, clause), default=0))
+            clause = set()
+            tautology = False
+    if clause and not tautology:
+        lits.extend(sorted(clause, key=abs))
+        offsets.append(len(lits))
+        num_vars = max(num_vars, max(map(abs, clause)))
+    return CSRClauses(num_vars, reader.num_clauses, lits, offsets)
+
+
+# Binary cache written next to the .cnf (<name>.cnf.bcnf) on first load, so later runs skip parsing:
+#   header: magic, num_vars, num_clauses, num_lits, num_rows, source size, source mtime_ns, source digest
+#   int32 literals, padded to 8 bytes, then int64 offsets (native byte order)
+# The cache is used while the source's size and mtime match; otherwise the source is rehashed and the cache is only
+# rewritten if the digest changed.
+CACHE_SUFFIX = ".bcnf"
+CACHE_MAGIC = b"BCNF\x00\x00\x00\x01"
+CACHE_HEADER = struct.Struct("=8sqqqqqq16s")
+
+
+def file_digest(file_name: str) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_name, 'rb') as file:
+        while chunk := file.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def read_cache(file_name: str) -> Optional[CSRClauses]:
+    """ Memory-maps the cache of file_name if it is still valid. The arrays are views into the mapping, not copies. """
+    cache_name = file_name + CACHE_SUFFIX
+    try:
+        with open(cache_name, 'rb') as file:
+            mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # no cache, or an empty file
+        return None
+    if len(mm) < CACHE_HEADER.size:
+        return None
+    magic, num_vars, num_clauses, num_lits, num_rows, size, mtime_ns, digest = CACHE_HEADER.unpack_from(mm)
+    lits_at = CACHE_HEADER.size
+    offsets_at = lits_at + (4 * num_lits + 7) // 8 * 8
+    if magic != CACHE_MAGIC or len(mm) != offsets_at + 8 * (num_rows + 1):
+        return None
+
+    stat = os.stat(file_name)
+    if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+        if file_digest(file_name) != digest:
+            return None
+        # only touched: remember the new mtime so the next run doesn't rehash
+        try:
+            with open(cache_name, 'r+b') as file:
+                file.write(CACHE_HEADER.pack(magic, num_vars, num_clauses, num_lits, num_rows,
+                                             stat.st_size, stat.st_mtime_ns, digest))
+        except OSError:
+            pass
+
+    if np is not None:
+        lits = np.frombuffer(mm, dtype=np.int32, count=num_lits, offset=lits_at)
+        offsets = np.frombuffer(mm, dtype=np.int64, count=num_rows + 1, offset=offsets_at)
+    else:
+        view = memoryview(mm)
+        lits = view[lits_at:lits_at + 4 * num_lits].cast('i')
+        offsets = view[offsets_at:].cast('q')
+    return CSRClauses(num_vars, num_clauses, lits, offsets)
+
+
+def write_cache(file_name: str, csr: CSRClauses):
+    stat = os.stat(file_name)
+    cache_name = file_name + CACHE_SUFFIX
+    tmp_name = f"{cache_name}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_name, 'wb') as file:
+            file.write(CACHE_HEADER.pack(CACHE_MAGIC, csr.num_vars, csr.num_clauses, len(csr.lits), len(csr),
+                                         stat.st_size, stat.st_mtime_ns, file_digest(file_name)))
+            file.write(memoryview(csr.lits).cast('B'))
+            file.write(bytes(-4 * len(csr.lits) % 8))
+            file.write(memoryview(csr.offsets).cast('B'))
+        os.replace(tmp_name, cache_name)  # readers never see a half-written cache
+    except OSError:  # e.g. a read-only benchmark directory; the cache is only an optimization
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+
+def load_csr(file_name: str, use_cache: bool = True) -> CSRClauses:
+    if use_cache:
+        csr = read_cache(file_name)
+        if csr is not None:
+            return csr
+    csr = read_csr(file_name)
+    if use_cache:
+        write_cache(file_name, csr)
+    return csr
+
+
+def load_dimacs(file_name: str, make_instance: Callable[[int, int], Any], use_cache: bool = True):
+    """ Builds an engine from a DIMACS file through add_clauses_csr, using (and creating) the binary cache """
+    if np is None and not use_cache:
+        return parse_dimacs(file_name, make_instance)
+    csr = load_csr(file_name, use_cache)
+    sat_instance = make_instance(csr.num_vars, csr.num_clauses)
+    for var in csr.variables():
+        sat_instance.add_variable(var)
+    sat_instance.add_clauses_csr(csr.lits, csr.offsets)
+    return sat_instance
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+""" Cube-and-conquer: a lookahead cuber splits the formula into cubes (conjunctions of decision literals) on a
+SATInstance2, then a pool of worker processes solves the formula with CDCLSolver, assuming one cube at a time. The
+formula is SAT iff one of the cubes is, so the run stops at the first SAT cube.
+
+Usage: python -m src.python.cubes <cnf file> [--cubes N] [--lookahead K] [--jobs N] [--time-limit T]
+                                  [--progress FILE]
+
+Progress goes to a JSON-lines file (<cnf file>.cubes by default): a header with the cubes, then one line per
+finished cube with its stats. Running again with the same file and settings only solves the cubes that are left.
+"""
+import argparse
+import heapq
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Dict, List, Optional
+from .csr import load_csr, load_dimacs, file_digest
+from .dpll2.sat_instance import SATInstance2
+from .cdcl.cdcl import CDCLSolver
+
+PROGRESS_SUFFIX = ".cubes"
+
+
+# ---- cubing ----
+
+def propagate_units(instance: SATInstance2) -> bool:
+    """ Unit propagation as in SATInstance2.propagate, without the pure literals; True on conflict """
+    while True:
+        l = instance.has_unit_clause()
+        if not l:
+            return False
+        instance.assign(l)
+        if instance.unit_propagate(l, 0):
+            return True
+
+
+def set_literal(instance: SATInstance2, lit: int):
+    instance.assign(lit)
+    instance.add_clause({lit})
+
+
+def dlcs_candidates(instance: SATInstance2, k: int) -> List[int]:
+    """ The k variables with the highest DLCS score (occurrences of both literals, as in SATInstance2.dlcs) """
+    counts: Dict[int, int] = {}
+    for l, cids in instance.literal2clause.items():
+        if cids:
+            counts[abs(l)] = counts.get(abs(l), 0) + len(cids)
+    return heapq.nlargest(k, counts, key=counts.get)
+
+
+def look_ahead(instance: SATInstance2, lit: int) -> Optional[int]:
+    """ Number of clauses satisfied by setting lit and propagating, or None if that runs into a conflict """
+    before = len(instance.id2clause)
+    instance.new_level()
+    set_literal(instance, lit)
+    failed = propagate_units(instance)
+    satisfied = before - len(instance.id2clause)
+    instance.backtrack()
+    return None if failed else satisfied
+
+
+class Cuber:
+    """ Splits on the variable whose two branches shrink the formula the most (product of the lookahead scores of
+    both polarities) among the top DLCS candidates. A candidate with a failing polarity is a failed literal: the other
+    polarity is implied, so it is set and the node is looked at again. lookahead = 0 splits on plain dlcs(). """
+    def __init__(self, instance: SATInstance2, lookahead: int = 8):
+        self.instance = instance
+        self.lookahead = lookahead
+        self.cubes: List[List[int]] = []
+        self.refuted = 0   # subtrees closed by the cuber itself
+        self.model: Optional[Dict[int, bool]] = None
+
+    def run(self, depth: int) -> List[List[int]]:
+        self.split(depth, [])
+        return self.cubes
+
+    def split(self, depth: int, cube: List[int]):
+        instance = self.instance
+        while True:
+            if propagate_units(instance):
+                self.refuted += 1
+                return
+            if len(instance.id2clause) == 0:
+                self.model = dict(instance.assignments)
+                return
+            if depth == 0:
+                self.cubes.append(list(cube))
+                return
+            if self.lookahead == 0:
+                branch = instance.dlcs()
+                break
+
+            branch, best, forced = 0, -1, 0
+            for var in dlcs_candidates(instance, self.lookahead):
+                pos = look_ahead(instance, var)
+                neg = look_ahead(instance, -var)
+                if pos is None and neg is None:
+                    self.refuted += 1
+                    return
+                if pos is None or neg is None:
+                    forced = var if neg is None else -var
+                    break
+                if (pos + 1) * (neg + 1) > best:
+                    best = (pos + 1) * (neg + 1)
+                    # the branch that satisfies more clauses goes first, like dlcs()
+                    branch = var if pos >= neg else -var
+            if not forced:
+                break
+            set_literal(instance, forced)
+
+        for lit in (branch, -branch):
+            instance.new_level()
+            set_literal(instance, lit)
+            cube.append(lit)
+            self.split(depth - 1, cube)
+            cube.pop()
+            instance.backtrack()
+            if self.model is not None:
+                return
+
+
+# ---- progress file ----
+
+def read_progress(path: str, header: dict):
+    """ (cubes, finished cube records) of an earlier run with the same header, or None. The file is rewritten
+    without the partial line a killed run can leave at the end, so new records can be appended to it. """
+    try:
+        with open(path) as file:
+            lines = file.read().splitlines()
+    except FileNotFoundError:
+        return None
+    try:
+        saved = json.loads(lines[0])
+    except (IndexError, ValueError):
+        return None
+    if any(saved.get(key) != value for key, value in header.items()):
+        return None
+
+    records = []
+    for line in lines[1:]:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            break
+    write_progress(path, saved, records)
+    return saved["Cubes"], records
+
+
+def write_progress(path: str, header: dict, records: List[dict]):
+    tmp_name = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_name, 'w') as file:
+        file.write(json.dumps(header) + "\n")
+        for record in records:
+            file.write(json.dumps(record) + "\n")
+    os.replace(tmp_name, path)
+
+
+# ---- conquering ----
+
+def worker_main(conn, file_name: str, cube_vars: List[int]):
+    sys.stdout = open(os.devnull, 'w')  # solve() prints progress
+    # one solver for all of this worker's cubes, so what it learns on one cube carries over to the next
+    solver = load_dimacs(file_name, CDCLSolver)
+    solver.use_ple = False  # pure literals of the whole formula needn't be pure under a cube
+    solver.frozen = set(cube_vars)  # every cube has to be assumable after variable elimination
+    while True:
+        task = conn.recv()
+        if task is None:
+            return
+        index, cube = task
+        start = time.time()
+        conflicts = solver.conflicts
+        sat, assignments = solver.solve(assumptions=cube)
+        record = {
+            "Cube": index,
+            "Result": "SAT" if sat else "UNSAT",
+            "Time": round(time.time() - start, 4),
+            "Conflicts": solver.conflicts - conflicts,
+            "Learnt": len(solver.learned_clauses),
+        }
+        if sat:
+            record["Solution"] = " ".join(f"{v} {a}" for v, a in assignments.items())
+        else:
+            record["Core"] = solver.core  # the cube literals it was refuted with
+        conn.send(record)
+
+
+def conquer(file_name: str, cubes: List[List[int]], todo: List[int], jobs: int, progress, deadline=None):
+    """ Solves the cubes with the given indices, appending a record per cube to progress. Returns the record of the
+    SAT cube, {} if every cube is UNSAT, or None if the deadline passed first. """
+    pending = list(reversed(todo))
+    cube_vars = sorted({abs(lit) for i in todo for lit in cubes[i]})
+    workers = []
+    for _ in range(min(jobs, len(todo))):
+        conn, child_conn = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=worker_main, args=(child_conn, file_name, cube_vars), daemon=True)
+        process.start()
+        child_conn.close()
+        workers.append((conn, process))
+
+    result = None
+    try:
+        busy = {}
+        for conn, _ in workers:
+            index = pending.pop()
+            conn.send((index, cubes[index]))
+            busy[conn] = index
+        while busy:
+            ready = wait(list(busy), timeout=max(0.0, deadline - time.time()) if deadline else None)
+            if not ready:
+                return None
+            for conn in ready:
+                index = busy.pop(conn)
+                try:
+                    record = conn.recv()
+                except EOFError:
+                    raise RuntimeError(f"worker died on cube {index}")
+                progress.write(json.dumps(record) + "\n")
+                progress.flush()
+                print(f"cube {index}: {record['Result']} {record['Time']:.2f}s {record['Conflicts']} conflicts"
+                      f" ({len(todo) - len(pending) - len(busy)}/{len(todo)})")
+                if record["Result"] == "SAT":
+                    result = record
+                    return result
+                if pending:
+                    index = pending.pop()
+                    conn.send((index, cubes[index]))
+                    busy[conn] = index
+        result = {}
+        return result
+    finally:
+        for conn, process in workers:
+            if result == {}:
+                conn.send(None)
+                process.join()
+            else:
+                process.kill()
+                process.join()
+            conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cube-and-conquer: split into cubes, solve the cubes in parallel")
+    parser.add_argument("input_file")
+    parser.add_argument("--cubes", type=int, default=1024, help="split this many ways (rounded up to a power of 2)")
+    parser.add_argument("--lookahead", type=int, default=8, help="DLCS candidates looked ahead on per split (0: plain dlcs)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds")
+    parser.add_argument("--progress", default=None, help=f"progress file (default: <cnf file>{PROGRESS_SUFFIX})")
+    args = parser.parse_args()
+    filename = Path(args.input_file).name
+    progress_name = args.progress or args.input_file + PROGRESS_SUFFIX
+    depth = max(0, math.ceil(math.log2(max(1, args.cubes))))
+
+    start = time.time()
+    deadline = start + args.time_limit if args.time_limit else None
+    csr = load_csr(args.input_file)
+    header = {"Instance": filename, "Digest": file_digest(args.input_file).hex(), "Depth": depth,
+              "Lookahead": args.lookahead}
+
+    sat, solution = None, None
+    resumed = read_progress(progress_name, header)
+    if resumed is not None:
+        cubes, records = resumed
+        done = {record["Cube"] for record in records}
+        print(f"Resuming: {len(done)} of {len(cubes)} cubes done")
+        for record in records:
+            if record["Result"] == "SAT":
+                sat, solution = True, record["Solution"]
+    else:
+        done = set()
+        cuber = Cuber(load_dimacs(args.input_file, SATInstance2), args.lookahead)
+        cubes = cuber.run(depth)
+        print(f"{len(cubes)} cubes ({cuber.refuted} refuted by the cuber) in {time.time() - start:.2f}s")
+        if cuber.model is not None:  # the cuber ran into a satisfying assignment
+            sat = True
+            solution = " ".join(f"{var} {cuber.model.get(var, True)}" for var in csr.variables())
+        else:
+            write_progress(progress_name, dict(header, Cubes=cubes), [])
+
+    if sat is None:
+        todo = [i for i in range(len(cubes)) if i not in done]
+        with open(progress_name, 'a') as progress:
+            record = conquer(args.input_file, cubes, todo, max(1, args.jobs), progress, deadline)
+        if record is None:
+            print(json.dumps({"Instance": filename, "Time": "--", "Result": "--"}))
+            sys.exit(1)
+        sat = bool(record)
+        solution = record.get("Solution")
+
+    elapsed = time.time() - start
+    print("Result:", "SAT" if sat else "UNSAT")
+    res = {"Instance": filename, "Time": f"{elapsed:.2f}", "Result": "SAT" if sat else "UNSAT", "Cubes": len(cubes)}
+    if sat:
+        tokens = solution.split()
+        if not csr.is_satisfied_by({int(v): a == "True" for v, a in zip(tokens[::2], tokens[1::2])}):
+            print("Incorrect assignment")
+        res["Solution"] = solution
+    print(json.dumps(res))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+""" Streaming DIMACS CNF parser shared by all the engines.
+
+The file is read in large binary chunks and each chunk is turned into ints with a single split(), so the whole
+file is never held in memory as lines. Clauses may span lines, and a line starting with '%' ends the input (as in
+the SATLIB benchmarks). gzip, bzip2 and xz files are decompressed on the fly.
+
+Any engine can be built through the builder interface, which every SAT instance class already has:
+    make_instance(num_vars, num_clauses) -> instance
+    instance.add_variable(var)       called once per variable, the first time it occurs
+    instance.add_clause(clause)      clause is a Set[int]
+"""
+import bz2
+import gzip
+import lzma
+from typing import Callable, Set, Any, Iterator, BinaryIO
+
+CHUNK_SIZE = 1 << 20
+
+
+class DimacsReader:
+    """ Reads the problem line, then hands out the clause section in chunks of whole lines with comments removed """
+    def __init__(self, file: BinaryIO, chunk_size: int = CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.num_vars, self.num_clauses = self.read_header()
+
+    def read_header(self) -> tuple[int, int]:
+        for line in self.file:
+            tokens = line.split()
+            if not tokens or tokens[0].startswith(b"c"):
+                continue
+            if tokens[0] != b"p":
+                break
+            if len(tokens) < 4 or tokens[1] != b"cnf":
+                raise ValueError("Error: DIMACS file format is not cnf")
+            return int(tokens[2]), int(tokens[3])
+        raise ValueError("Error: DIMACS file does not have problem line")
+
+    def chunks(self) -> Iterator[bytes]:
+        rest = b""  # incomplete last line of the previous chunk
+        done = False
+        while not done:
+            chunk = self.file.read(self.chunk_size)
+            if not chunk:
+                done = True
+                body = rest
+            else:
+                cut = chunk.rfind(b"\n") + 1
+                if cut == 0:  # no full line yet
+                    rest += chunk
+                    continue
+                body = rest + chunk[:cut]
+                rest = chunk[cut:]
+
+            # comments and '%' only ever start a line; clause lines never contain letters
+            if b"c" in body or b"%" in body:
+                lines = []
+                for line in body.splitlines():
+                    stripped = line.lstrip()
+                    if stripped.startswith(b"c"):
+                        continue
+                    if stripped.startswith(b"%"):
+                        done = True
+                        break
+                    lines.append(line)
+                body = b"\n".join(lines)
+            yield body
+
+
+# compressed inputs are recognized by their magic bytes (not the extension) and decompressed as they are read
+COMPRESSED_FORMATS = (
+    (b"\x1f\x8b", gzip.open),
+    (b"BZh", bz2.open),
+    (b"\xfd7zXZ\x00", lzma.open),
+)
+
+
+def open_dimacs(file_name: str) -> BinaryIO:
+    try:
+        file = open(file_name, 'rb')
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Error: DIMACS file is not found {file_name}")
+
+    magic = file.read(6)
+    for prefix, open_compressed in COMPRESSED_FORMATS:
+        if magic.startswith(prefix):
+            file.close()
+            return open_compressed(file_name, 'rb')
+    file.seek(0)
+    return file
+
+
+def parse_dimacs(file_name: str, make_instance: Callable[[int, int], Any], chunk_size: int = CHUNK_SIZE):
+    with open_dimacs(file_name) as file:
+        reader = DimacsReader(file, chunk_size)
+        sat_instance = make_instance(reader.num_vars, reader.num_clauses)
+        seen = bytearray(reader.num_vars + 1)  # var --> has been passed to add_variable
+        clause: Set[int] = set()
+        for body in reader.chunks():
+            try:
+                literals = list(map(int, body.split()))
+            except ValueError as e:
+                raise ValueError(f"Error: bad token in clause: {e}")
+
+            for literal in literals:
+                if literal == 0:
+                    sat_instance.add_clause(clause)
+                    clause = set()
+                    continue
+                var = literal if literal > 0 else -literal
+                if var >= len(seen):
+                    seen.extend(bytes(var + 1 - len(seen)))
+                if not seen[var]:
+                    seen[var] = 1
+                    sat_instance.add_variable(var)
+                clause.add(literal)
+
+        if clause:  # last clause without its terminating 0
+            sat_instance.add_clause(clause)
+
+    return sat_instance
@@ -1,12 +1,56 @@
+import time
 from .sat_instance import SATInstance1
-from typing import Set, List, Tuple
+from typing import Optional, Set, List, Tuple
 
 DEBUG = False
 
 
 def dpll_solve(
-    sat_instance: SATInstance1, level: int = 0
-) -> Tuple[bool, dict[int, bool]]:
+    sat_instance: SATInstance1, time_limit: Optional[float] = None
+) -> Optional[Tuple[bool, dict[int, bool]]]:
+    """ None if time_limit (seconds) ran out first. Splits in a loop over an explicit stack rather than recursively
+    (like dpll_driver.py), but still on copies: every first branch works on copies of the clauses and assignments,
+    and the originals are kept on the stack for the second branch. """
+    deadline = time.time() + time_limit if time_limit else None
+    # (decision literal, assignments and clauses to go back to for its second branch, or None once it is the second branch)
+    stack: List[Tuple[int, Optional[dict], Optional[List[Set[int]]]]] = []
+    while True:
+        if deadline is not None and time.time() > deadline:
+            return None
+        level = len(stack)
+        if not propagate(sat_instance, level):
+            if len(sat_instance.clauses) == 0:
+                debug_print("Clauses list is empty (SAT)", level)
+                return True, sat_instance.assignments
+
+            # splitting
+            # random search heuristic
+            random_assignment = next(iter(sat_instance.clauses[0]))
+            debug_print(f"Branching with {random_assignment} set to True", level)
+            stack.append((random_assignment, sat_instance.assignments, sat_instance.clauses))
+            sat_instance.assignments = {k: v for k, v in sat_instance.assignments.items()}
+            sat_instance.assign(random_assignment)
+            sat_instance.clauses = [c.copy() for c in sat_instance.clauses]
+            sat_instance.add_clause({random_assignment})
+            continue
+
+        # conflict: go back to the deepest decision whose second branch is still open
+        while stack:
+            literal, old_assignments, old_clauses = stack.pop()
+            if old_assignments is not None:
+                debug_print(f"Branching with {literal} set to False", len(stack))
+                stack.append((-literal, None, None))
+                sat_instance.assignments = old_assignments
+                sat_instance.assign(-literal)
+                sat_instance.clauses = old_clauses
+                sat_instance.add_clause({-literal})
+                break
+        else:
+            return False, {}
+
+
+def propagate(sat_instance: SATInstance1, level: int) -> bool:
+    """ Unit propagation, then pure literal elimination; True on conflict """
     # unit propagation
     while True:
         l = has_unit_clause(sat_instance.clauses)  # NOTE
@@ -18,7 +62,7 @@ def dpll_solve(
             l, sat_instance.clauses
         )  # NOTE
         if empty_clause_found:
-            return False, {}
+            return True
         sat_instance.clauses = new_clauses
 
     # pure literal elimination
@@ -29,42 +73,7 @@ def dpll_solve(
         debug_print(f"Running literal elimination on {l}", level)
         sat_instance.assign(l)  # assign l to true
         sat_instance.clauses = literal_eliminate(l, sat_instance.clauses)  # NOTE
-
-    if len(sat_instance.clauses) == 0:
-        debug_print("Clauses list is empty (SAT)", level)
-        return True, sat_instance.assignments
-
-    # splitting
-    # random search heuristic
-    random_assignment = next(iter(sat_instance.clauses[0]))
-    debug_print(f"Recurring with {random_assignment} set to True", level)
-
-    old_assignments = sat_instance.assignments
-    new_assignments = {k: v for k, v in sat_instance.assignments.items()}
-    sat_instance.assignments = new_assignments
-    sat_instance.assign(random_assignment)
-
-    old_clauses = sat_instance.clauses
-    new_clauses = [c.copy() for c in sat_instance.clauses]
-    sat_instance.clauses = new_clauses
-    sat_instance.add_clause({random_assignment})
-
-    branch_a, assignments = dpll_solve(sat_instance, level + 1)
-    if branch_a:
-        return True, assignments
-
-    sat_instance.assignments = old_assignments
-    sat_instance.assign(-random_assignment)
-
-    sat_instance.clauses = old_clauses
-    sat_instance.add_clause({-random_assignment})
-
-    debug_print(f"Recurring with {random_assignment} set to False", level)
-    branch_b, assignments = dpll_solve(sat_instance, level + 1)
-
-    if branch_b:
-        return branch_b, assignments
-    return branch_b, {}
+    return False
 
 
 def has_unit_clause(clauses: List[Set[int]]) -> int:
@@ -1,61 +1,15 @@
-from .sat_instance import SATInstance2, debug_print
-from typing import Set, List, Tuple
+import time
+from .sat_instance import SATInstance2
+from ..dpll_driver import dpll_search
+from typing import Optional, Tuple
 
 def dpll_solve2(
-    sat_instance: SATInstance2, level: int = 0
-) -> Tuple[bool, dict[int, bool]]:
-    # unit propagation
-    while True:
-        l = sat_instance.has_unit_clause()
-        if not l:  # l = 0
-            break
-        debug_print(f"Running unit propagation on {l}", level)
-        sat_instance.assign(l)  # assign l to true
-        empty_clause_found = sat_instance.unit_propagate(l, level)  # NOTE
-        if empty_clause_found:
-            debug_print("Empty clause found during unit prop", level)
-            return False, {}
-
-    # pure literal elimination
-    while True:
-        l = sat_instance.has_pure_literal()
-        if not l:  # l = 0
-            break
-        debug_print(f"Running literal elimination on {l}", level)
-        sat_instance.assign(l)  # assign l to true
-        sat_instance.literal_eliminate(l, level)
-
-    if len(sat_instance.id2clause) == 0:
-        debug_print("Clauses list is empty (SAT)", level)
-        return True, sat_instance.assignments
-
-    # splitting
-    # random search heuristic
-    dlcs_out = sat_instance.randomized_dlcs()
-    debug_print(f"Recurring with {dlcs_out} set to True", level)
-
-    old_assignments, old_literal2clause, old_unit_clauses, old_id2clause = sat_instance.copy()
-    sat_instance.assign(dlcs_out)
-    sat_instance.add_clause({dlcs_out})
-
-    branch_a, assignments = dpll_solve2(sat_instance, level + 1)
-    if branch_a:
-        return True, assignments
-
-    sat_instance.assignments = old_assignments
-    sat_instance.unit_clauses = old_unit_clauses
-    sat_instance.literal2clause = old_literal2clause
-    sat_instance.id2clause = old_id2clause
-    
-    sat_instance.assign(-dlcs_out)
-    sat_instance.add_clause({-dlcs_out})
-
-    debug_print(f"Recurring with {dlcs_out} set to False", level)
-    branch_b, assignments = dpll_solve2(sat_instance, level + 1)
-
-    if branch_b:
-        return branch_b, assignments
-    return branch_b, {}
+    sat_instance: SATInstance2, time_limit: Optional[float] = None
+) -> Optional[Tuple[bool, dict[int, bool]]]:
+    """ None if time_limit (seconds) ran out first. The search itself is dpll_search; unit propagation and pure
+    literal elimination run at every node (SATInstance2.propagate). """
+    deadline = time.time() + time_limit if time_limit else None
+    return dpll_search(sat_instance, deadline)
 
 
 
@@ -128,6 +82,9 @@ Currently, recursion is used to split. The cost of this is two fold.
 
 so the goal is to shift to an iterative approach where i use a stack to record changes rather than copying all of my datastuctures.
 
+both are done: SATInstance2 logs every change on an undo stack and backtrack() pops it back to the last new_level(),
+and the splitting is a loop over an explicit decision stack (dpll_driver.py)
+
 current data structures im copying
 - id2clause (total number of literals across all clauses)
 - assignments (total number of variables)
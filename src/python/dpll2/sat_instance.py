@@ -2,6 +2,20 @@ from typing import Set, List, Dict
 import random
 from .utils import FunctionStats, track_call_and_time, debug_print
 
+HEURISTICS = ("dlcs", "dlis", "randomized_dlcs", "randomized_dlis")
+
+# Undo log entries: (op, ...) tuples recording how to revert one change to the data structures
+UNDO_ASSIGN = 0      # (op, var, old value or None)
+UNDO_ADD_CLAUSE = 1  # (op, cid): a clause was added
+UNDO_DEL_CLAUSE = 2  # (op, cid, clause): a clause was removed from id2clause
+UNDO_DEL_LIT = 3     # (op, clause, literal): a literal was removed from a clause
+UNDO_ADD_OCC = 4     # (op, literal, cid): a clause id was added to literal2clause[literal]
+UNDO_DEL_OCC = 5     # (op, literal, cid): a clause id was removed from literal2clause[literal]
+UNDO_NEW_OCCS = 6    # (op, literal): a literal2clause entry was created
+UNDO_DEL_OCCS = 7    # (op, literal, cids): the whole literal2clause[literal] entry was removed
+UNDO_ADD_UNIT = 8    # (op, cid): cid was added to unit_clauses
+UNDO_DEL_UNIT = 9    # (op, cid): cid was removed from unit_clauses
+
 class SATInstance2:
     def __init__(self, num_vars: int, num_clauses: int):
         self.num_vars = num_vars
@@ -11,11 +25,18 @@ class SATInstance2:
         self.clauses: List[Set[int]] = []
         self.assignments: Dict[int, bool] = {}
 
+        self.heuristic = "randomized_dlcs"  # splitting method: one of HEURISTICS
+
         # Extra data structures
         self.id2clause: Dict[int, Set[int]] = {} # id --> clause
         self.unit_clauses: Set[int] = set() # set of ids of all unit clauses
         self.literal2clause: Dict[int, Set[int]] = {} # literal --> Set of clauses containing literal
 
+        # Backtracking: every change to the structures above goes on the undo log, and backtrack() reverts the
+        # changes made since the matching new_level(), so a split costs what it changes rather than a full copy
+        self.undo: List[tuple] = []
+        self.undo_lim: List[int] = []  # undo log size at each new_level()
+
         # tracking stats
         self.function_stats: dict[str, FunctionStats] = {}
         self.function_stats["add_clause"] = FunctionStats()
@@ -28,7 +49,7 @@ class SATInstance2:
         self.function_stats["unit_propagate"] = FunctionStats()
         self.function_stats["has_pure_literal"] = FunctionStats()
         self.function_stats["literal_eliminate"] = FunctionStats()
-        self.function_stats["copy"] = FunctionStats()
+        self.function_stats["backtrack"] = FunctionStats()
 
     def add_variable(self, literal: int):
         self.vars.add(abs(literal))
@@ -41,19 +62,43 @@ class SATInstance2:
             if -l in clause:
                 return
             
-        if len(clause) == 1:
+        log = self.undo.append
+        if len(clause) == 1 and id_ not in self.unit_clauses:
             self.unit_clauses.add(id_)
+            log((UNDO_ADD_UNIT, id_))
         for l in clause:
             if l not in self.literal2clause:
                 self.literal2clause[l] = set()
+                log((UNDO_NEW_OCCS, l))
+            else:
+                log((UNDO_ADD_OCC, l, id_))
             self.literal2clause[l].add(id_)
 
         self.id2clause[id_] = clause
         self.clauses.append(clause)
+        log((UNDO_ADD_CLAUSE, id_))
+
+    # bulk add_clause for clauses in CSR form (see csr.py), already free of duplicates and tautologies
+    def add_clauses_csr(self, lits, offsets):
+        lits = lits.tolist()
+        offsets = offsets.tolist()
+        for i in range(len(offsets) - 1):
+            clause = set(lits[offsets[i]:offsets[i + 1]])
+            id_ = id(clause)
+            if len(clause) == 1:
+                self.unit_clauses.add(id_)
+            for l in clause:
+                if l not in self.literal2clause:
+                    self.literal2clause[l] = set()
+                self.literal2clause[l].add(id_)
+            self.id2clause[id_] = clause
+            self.clauses.append(clause)
 
     @track_call_and_time
     def assign(self, literal: int):
-        self.assignments[abs(literal)] = True if literal > 0 else False
+        var = abs(literal)
+        self.undo.append((UNDO_ASSIGN, var, self.assignments.get(var)))
+        self.assignments[var] = True if literal > 0 else False
 
     @track_call_and_time
     def has_unit_clause(self) -> int:
@@ -66,36 +111,41 @@ class SATInstance2:
 
     @track_call_and_time
     def unit_propagate(self, literal: int, level: int) -> bool:
+        log = self.undo.append
         # delete all clauses that contain the target literal
         for cid in self.literal2clause[literal]:
             if cid in self.unit_clauses: # update unit_clauses
                 self.unit_clauses.remove(cid)
+                log((UNDO_DEL_UNIT, cid))
             for l in self.id2clause[cid]: # udpate literal2clause
                 if l != literal:
                     self.literal2clause[l].remove(cid)
+                    log((UNDO_DEL_OCC, l, cid))
             debug_print(f"Removing {cid} from id2clause", level)
-            del self.id2clause[cid]  # remove clause
+            log((UNDO_DEL_CLAUSE, cid, self.id2clause.pop(cid)))  # remove clause
 
         debug_print(f"Removing {literal} from literal2clause", level)
 
         # nuke literal entry from literal2clause
-        del self.literal2clause[literal]
+        log((UNDO_DEL_OCCS, literal, self.literal2clause.pop(literal)))
 
         # remove the literal from any clauses that contain the negation of the target literal
         if -literal in self.literal2clause:
             for cid in self.literal2clause[-literal]:
                 clause = self.id2clause[cid]
                 clause.remove(-literal)  # remove -literal from clause
+                log((UNDO_DEL_LIT, clause, -literal))
                 if len(clause) == 0: # unsat condition
                     assert cid in self.unit_clauses
                     return True
                 if len(clause) == 1: # update unit clauses
                     self.unit_clauses.add(cid)
+                    log((UNDO_ADD_UNIT, cid))
 
             debug_print(f"Removing {-literal} from literal2clause", level)
             
             # nuke -literal entry from literal2clause
-            del self.literal2clause[-literal]
+            log((UNDO_DEL_OCCS, -literal, self.literal2clause.pop(-literal)))
 
         return False
 
@@ -113,15 +163,17 @@ class SATInstance2:
     # literal elimination
     @track_call_and_time
     def literal_eliminate(self, literal: int, level: int):
+        log = self.undo.append
         for cid in self.literal2clause[literal]:
             for l in self.id2clause[cid]: # udpate literal2clause
                 if l != literal:
                     self.literal2clause[l].remove(cid)
+                    log((UNDO_DEL_OCC, l, cid))
                     
             debug_print(f"Removing {cid} from id2clause", level)
-            del self.id2clause[cid]  # delete all clauses that contain the target literal
+            log((UNDO_DEL_CLAUSE, cid, self.id2clause.pop(cid)))  # delete all clauses that contain the target literal
             
-        del self.literal2clause[literal]  # nuke target literal entry from literal2clause
+        log((UNDO_DEL_OCCS, literal, self.literal2clause.pop(literal)))  # nuke target literal entry from literal2clause
 
     # returns the literal used for dlcs
     @track_call_and_time
@@ -206,27 +258,81 @@ class SATInstance2:
         return random.choice(top3_literals)
     
 
+    # search interface for dpll_search (see dpll_driver.py)
+    def propagate(self, level: int) -> bool:
+        """ Unit propagation, then pure literal elimination; True on conflict """
+        while True:
+            l = self.has_unit_clause()
+            if not l:  # l = 0
+                break
+            debug_print(f"Running unit propagation on {l}", level)
+            self.assign(l)  # assign l to true
+            if self.unit_propagate(l, level):
+                debug_print("Empty clause found during unit prop", level)
+                return True
+
+        while True:
+            l = self.has_pure_literal()
+            if not l:  # l = 0
+                break
+            debug_print(f"Running literal elimination on {l}", level)
+            self.assign(l)  # assign l to true
+            self.literal_eliminate(l, level)
+        return False
+
+    def is_solved(self) -> bool:
+        return len(self.id2clause) == 0
+
+    def choose_literal(self) -> int:
+        return getattr(self, self.heuristic)()
+
+    def branch(self, literal: int, level: int):
+        debug_print(f"Branching with {literal} set to True", level)
+        self.new_level()
+        self.assign(literal)
+        self.add_clause({literal})
+
+    def undo_branch(self, literal: int, level: int):
+        self.backtrack()
+
+    def new_level(self):
+        """ Marks the point backtrack() returns to """
+        self.undo_lim.append(len(self.undo))
+
     @track_call_and_time
-    def copy(self):
-        old_assignments = self.assignments
-        new_assignments = {k: v for k, v in self.assignments.items()}
-        self.assignments = new_assignments
-
-        old_literal2clause = self.literal2clause
-        new_literal2clause = {
-            literal: set(cids) for literal, cids in self.literal2clause.items()
-        }
-        self.literal2clause = new_literal2clause
-
-        old_unit_clauses = self.unit_clauses
-        new_unit_clauses = set(self.unit_clauses)
-        self.unit_clauses = new_unit_clauses
-
-        old_id2clause = self.id2clause
-        new_id2clause = {cid: set(c) for cid, c in self.id2clause.items()}
-        self.id2clause = new_id2clause
-
-        return old_assignments, old_literal2clause, old_unit_clauses, old_id2clause
+    def backtrack(self):
+        """ Reverts every change since the last new_level(), newest first """
+        undo = self.undo
+        lim = self.undo_lim.pop()
+        assignments, id2clause, literal2clause, unit_clauses = \
+            self.assignments, self.id2clause, self.literal2clause, self.unit_clauses
+        while len(undo) > lim:
+            entry = undo.pop()
+            op = entry[0]
+            if op == UNDO_DEL_OCC:
+                literal2clause[entry[1]].add(entry[2])
+            elif op == UNDO_DEL_CLAUSE:
+                id2clause[entry[1]] = entry[2]
+            elif op == UNDO_DEL_LIT:
+                entry[1].add(entry[2])
+            elif op == UNDO_DEL_OCCS:
+                literal2clause[entry[1]] = entry[2]
+            elif op == UNDO_ASSIGN:
+                if entry[2] is None:
+                    del assignments[entry[1]]
+                else:
+                    assignments[entry[1]] = entry[2]
+            elif op == UNDO_ADD_UNIT:
+                unit_clauses.discard(entry[1])
+            elif op == UNDO_DEL_UNIT:
+                unit_clauses.add(entry[1])
+            elif op == UNDO_ADD_OCC:
+                literal2clause[entry[1]].discard(entry[2])
+            elif op == UNDO_NEW_OCCS:
+                del literal2clause[entry[1]]
+            else:  # UNDO_ADD_CLAUSE
+                del id2clause[entry[1]]
+                self.clauses.pop()
 
     def __str__(self) -> str:
         result = []
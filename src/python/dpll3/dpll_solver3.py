@@ -1,43 +1,24 @@
-from .sat_instance import SATInstance3, debug_print
-from typing import Set, List, Tuple
+import time
+from .sat_instance import SATInstance3
+from ..dpll_driver import dpll_search
+from typing import Optional, Tuple
 
 DEBUG = False
 
 
-def dpll_solve3(sat_instance: SATInstance3) -> Tuple[bool, dict[int, bool]]:
+def dpll_solve3(sat_instance: SATInstance3, time_limit: Optional[float] = None) -> Optional[Tuple[bool, dict[int, bool]]]:
+    """ None if time_limit (seconds) ran out first """
+    deadline = time.time() + time_limit if time_limit else None
     sat_instance.pure_literal_eliminate()
     sat_instance.setup()
-    return solve(sat_instance)
-
-
-def solve(sat_instance: SATInstance3, level: int = 0) -> Tuple[bool, dict[int, bool]]:
-    # unit propagation
-    conflict = sat_instance.unit_propagate(level)
-    if conflict:
-        return False, {}
-
-    if sat_instance.is_sat():
-        debug_print("All vars are assigned", level)
-        return True, sat_instance.assignments
-
-    # splitting
-    # random search heuristic
-    literal_to_split_on = sat_instance.dlcs()
-    sat_instance.assign(literal_to_split_on, level)
-
-    branch_a, assignments = solve(sat_instance, level + 1)
-    if branch_a:
-        return True, assignments
-
-    sat_instance.unassign(literal_to_split_on, level)
-    sat_instance.assign(-literal_to_split_on, level)
-    branch_b, assignments = solve(sat_instance, level + 1)
-    return branch_b, assignments
+    return dpll_search(sat_instance, deadline)
 
 
 """
 Next improvement: using a stack instead of recursion / backtracking manually instead of copying
 
+(done: the splitting is now a loop over an explicit decision stack, see dpll_driver.py)
+
 Currently, recursion is used to split. The cost of this is two fold.
 1) recursion is generally expensive compared to iterative approaches
 
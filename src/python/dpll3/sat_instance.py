@@ -87,6 +87,20 @@ class SATInstance3:
         # id2clause
         self.id2clause[id_] = clause
 
+    # bulk add_clause for clauses in CSR form (see csr.py), already free of duplicates and tautologies
+    def add_clauses_csr(self, lits, offsets):
+        lits = lits.tolist()
+        offsets = offsets.tolist()
+        for i in range(len(offsets) - 1):
+            clause = set(lits[offsets[i]:offsets[i + 1]])
+            assert len(clause)
+            id_ = id(clause)
+            for l in clause:
+                if l not in self.literal2clause:
+                    self.literal2clause[l] = set()
+                self.literal2clause[l].add(id_)
+            self.id2clause[id_] = clause
+
     def setup(self):
         for cid, clause in self.id2clause.items():
             # unit clauses
@@ -217,6 +231,22 @@ class SATInstance3:
             if literal_to_unassign == literal:
                 break
 
+    # search interface for dpll_search (see dpll_driver.py)
+    def propagate(self, level: int) -> bool:
+        return self.unit_propagate(level)
+
+    def is_solved(self) -> bool:
+        return self.is_sat()
+
+    def choose_literal(self) -> int:
+        return self.dlcs()
+
+    def branch(self, literal: int, level: int):
+        self.assign(literal, level)
+
+    def undo_branch(self, literal: int, level: int):
+        self.unassign(literal, level)
+
     """ Based on the current assignments, returns 1 if the literal's value is true, -1 if the value is false, and 0 if it's unassigned"""
 
     def value(self, literal: int) -> int:
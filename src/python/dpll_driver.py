@@ -0,0 +1,39 @@
+""" Iterative DPLL search for SATInstance2 and SATInstance3: an explicit stack of decisions instead of one recursive
+call per decision, so the search depth isn't bounded by the recursion limit and a timeout can end the search at any
+depth without unwinding anything.
+
+The instance provides:
+    propagate(level) -> bool        unit propagation (and whatever else the engine does at every node); True on conflict
+    is_solved() -> bool
+    choose_literal() -> int         the literal to branch on
+    branch(literal, level)          opens decision level `level` with literal set to True
+    undo_branch(literal, level)     reverts everything since branch(literal, level)
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+def dpll_search(instance, deadline: Optional[float] = None) -> Optional[Tuple[bool, Dict[int, bool]]]:
+    """ (sat, assignments), or None if time.time() passed deadline first """
+    stack: List[Tuple[int, bool]] = []  # (decision literal, True once it is the second branch)
+    while True:
+        if deadline is not None and time.time() > deadline:
+            return None
+        if not instance.propagate(len(stack)):
+            if instance.is_solved():
+                return True, instance.assignments
+            literal = instance.choose_literal()
+            stack.append((literal, False))
+            instance.branch(literal, len(stack))
+            continue
+
+        # conflict: drop the decisions whose second branch failed as well, then flip the deepest one left
+        while stack:
+            literal, flipped = stack.pop()
+            instance.undo_branch(literal, len(stack) + 1)
+            if not flipped:
+                stack.append((-literal, True))
+                instance.branch(-literal, len(stack))
+                break
+        else:
+            return False, {}
@@ -0,0 +1,77 @@
+""" Runs any of the engines on a CNF file behind one function, for the batch runner.
+
+    run_engine(file_name, engine, **options) -> EngineResult
+
+SAT answers are verified against the original clauses (the DPLL engines' own check() only sees the clauses that
+are left at the end of the search).
+"""
+import random
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from .clock import Clock
+from .csr import load_csr, load_dimacs
+from .dimacs import parse_dimacs
+from .dpll1.sat_instance import SATInstance1
+from .dpll1.dpll_solver import dpll_solve
+from .dpll2.sat_instance import SATInstance2
+from .dpll2.dpll_solver2 import dpll_solve2
+from .dpll3.sat_instance import SATInstance3
+from .dpll3.dpll_solver3 import dpll_solve3
+from .cdcl.cdcl import CDCLSolver
+from .cdcl.restarts import RESTART_POLICIES
+
+ENGINES = ("cdcl", "dpll1", "dpll2", "dpll3")
+
+
+@dataclass
+class EngineResult:
+    sat: bool
+    assignments: Dict[int, bool]
+    parse_time: float
+    solve_time: float
+    verified: bool                                  # UNSAT answers can't be checked and count as verified
+    stats: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+
+def run_engine(file_name: str, engine: str = "cdcl", restart: str = "luby", seed: int = 0,
+               heuristic: Optional[str] = None) -> EngineResult:
+    """ restart only applies to cdcl; heuristic to cdcl (vsids | branch_random_lit) and dpll2 (see HEURISTICS).
+    A nonzero seed diversifies cdcl (set_seed) and seeds the random heuristics of dpll2. """
+    random.seed(seed)
+    watch = Clock()
+    watch.start()
+    if engine == "cdcl":
+        instance = load_dimacs(file_name, CDCLSolver)
+        instance.restart_policy = RESTART_POLICIES[restart]()
+        if heuristic:
+            instance.heuristic = heuristic
+        if seed:
+            instance.set_seed(seed)
+    elif engine == "dpll1":
+        instance = parse_dimacs(file_name, SATInstance1)
+    elif engine == "dpll2":
+        instance = load_dimacs(file_name, SATInstance2)
+        if heuristic:
+            instance.heuristic = heuristic
+    elif engine == "dpll3":
+        instance = load_dimacs(file_name, SATInstance3)
+    else:
+        raise ValueError(f"Unknown engine: {engine}")
+    watch.stop()
+    parse_time = watch.get_time()
+
+    watch = Clock()
+    watch.start()
+    if engine == "cdcl":
+        sat, assignments = instance.solve()
+    elif engine == "dpll1":
+        sat, assignments = dpll_solve(instance)
+    elif engine == "dpll2":
+        sat, assignments = dpll_solve2(instance)
+    else:
+        sat, assignments = dpll_solve3(instance)
+    watch.stop()
+
+    verified = not sat or load_csr(file_name).is_satisfied_by(assignments)
+    stats = {name: {"count": s.count, "time": s.time} for name, s in getattr(instance, "function_stats", {}).items()}
+    return EngineResult(sat, dict(assignments), parse_time, watch.get_time(), verified, stats)
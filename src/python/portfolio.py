@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+""" Portfolio mode: races several engine configurations on one instance, one process each, and reports the first
+verified answer. The other processes are killed as soon as it comes in.
+
+Usage: python -m src.python.portfolio <cnf file> [--jobs N] [--time-limit T]
+
+The first N configurations of PORTFOLIO are used (N = number of cores by default), so the list is ordered by how
+well each configuration does on its own.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import List, Optional
+from .engines import run_engine
+
+PORTFOLIO = [
+    {"engine": "cdcl", "restart": "luby"},
+    {"engine": "cdcl", "restart": "glucose", "seed": 1},
+    {"engine": "cdcl", "restart": "luby", "seed": 2},
+    {"engine": "dpll2", "heuristic": "randomized_dlcs", "seed": 3},
+    {"engine": "cdcl", "restart": "none", "seed": 4},
+    {"engine": "dpll3"},
+    {"engine": "cdcl", "restart": "glucose", "seed": 5},
+    {"engine": "dpll2", "heuristic": "dlis"},
+]
+
+
+def config_name(config: dict) -> str:
+    return " ".join(f"{k}={v}" for k, v in config.items())
+
+
+def racer_main(conn, file_name: str, config: dict):
+    sys.stdout = open(os.devnull, 'w')  # the engines print progress
+    try:
+        result = run_engine(file_name, **config)
+        conn.send((result.sat, result.assignments, result.verified, None))
+    except Exception as e:
+        conn.send((False, {}, False, f"{type(e).__name__}: {e}"))
+
+
+def race(file_name: str, configs: List[dict], time_limit: Optional[float] = None):
+    """ Returns (sat, assignments, winning config), or None if no configuration answered in time """
+    racers = []
+    for config in configs:
+        conn, child_conn = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=racer_main, args=(child_conn, file_name, config), daemon=True)
+        process.start()
+        child_conn.close()
+        racers.append((conn, process, config))
+
+    deadline = time.time() + time_limit if time_limit else None
+    winner = None
+    try:
+        running = {conn: config for conn, _, config in racers}
+        while running and winner is None:
+            timeout = max(0.0, deadline - time.time()) if deadline else None
+            ready = wait(list(running), timeout=timeout)
+            if not ready:  # out of time
+                break
+            for conn in ready:
+                config = running.pop(conn)
+                try:
+                    sat, assignments, verified, error = conn.recv()
+                except EOFError:  # the racer died
+                    continue
+                if error:
+                    print(f"{config_name(config)} failed: {error}")
+                elif not verified:
+                    print(f"{config_name(config)} returned an incorrect assignment")
+                else:
+                    winner = (sat, assignments, config)
+                    break
+    finally:
+        for conn, process, _ in racers:
+            if process.is_alive():
+                process.kill()
+            process.join()
+            conn.close()
+    return winner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Race several solver configurations on one instance")
+    parser.add_argument("input_file")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="configurations to race (default: all cores)")
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds")
+    args = parser.parse_args()
+
+    filename = Path(args.input_file).name
+    configs = PORTFOLIO[:max(1, args.jobs)]
+
+    start = time.time()
+    winner = race(args.input_file, configs, args.time_limit)
+    elapsed = time.time() - start
+
+    if winner is None:
+        print(json.dumps({"Instance": filename, "Time": "--", "Result": "--"}))
+        sys.exit(1)
+
+    sat, assignments, config = winner
+    res = {
+        "Instance": filename,
+        "Time": f"{elapsed:.2f}",
+        "Result": "SAT" if sat else "UNSAT",
+        "Engine": config_name(config),
+    }
+    if sat:
+        res["Solution"] = " ".join(f"{v} {a}" for v, a in assignments.items())
+    print("Result:", "SAT" if sat else "UNSAT", "from", config_name(config))
+    print(json.dumps(res))
+
+
+if __name__ == "__main__":
+    main()
